@@ -1,361 +1,322 @@
-from flask import Flask, Response, request, jsonify
-import cv2
-import threading
 import time
+
+# Measured from before the web framework and any subsystem is imported
+STARTUP_BEGAN = time.perf_counter()
+
+from flask import Flask, Blueprint, Response, request, jsonify, g, current_app
+from werkzeug.exceptions import HTTPException
+import argparse
 import os
-from pymycobot import MechArm270
-
-app = Flask(__name__)
-
-# Robot arm initialization
-try:
-    arm = MechArm270("/dev/ttyAMA0", 1000000)
-    print("Robot arm initialized successfully.")
-except Exception as e:
-    arm = None
-    print(f"Error initializing robot arm: {e}")
-
-# Thread-safe camera management
-camera_lock = threading.Lock()
-active_cameras = {}
-
-def get_camera_stream(camera_id):
-    """Get or create a camera stream for the given camera_id"""
-    with camera_lock:
-        if camera_id not in active_cameras:
-            try:
-                cap = cv2.VideoCapture(camera_id)
-                if cap.isOpened():
-                    active_cameras[camera_id] = cap
-                else:
-                    return None
-            except Exception as e:
-                print(f"Error opening camera {camera_id}: {e}")
-                return None
-        return active_cameras[camera_id]
-
-def generate_frames(camera_id):
-    """Generate video frames from camera"""
-    cap = get_camera_stream(camera_id)
-    if not cap:
-        yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n'
-               b'Error: Camera not available\r\n')
-        return
-        
-    while True:
-        try:
-            with camera_lock:
-                success, frame = cap.read()
-            
-            if not success:
-                break
-                
-            ret, buffer = cv2.imencode('.jpg', frame)
-            if not ret:
-                break
-                
-            frame_bytes = buffer.tobytes()
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-        except Exception as e:
-            print(f"Error generating frame: {e}")
-            break
+import signal
+import sys
+import yaml
+from metrics import MetricsRegistry, process_rss_bytes
+from profiling import Profiling, install_flask, PROFILING_DOCS
 
-# Robot Control API Endpoints
+# Server roles and the subsystems each one loads
+ROLES = {
+    'all': ('robot', 'video', 'vision'),
+    'robot': ('robot',),
+    'video': ('video', 'vision'),
+}
 
-@app.route('/robot/status', methods=['GET'])
-def robot_status():
-    """Get current robot arm status"""
-    if not arm:
-        return jsonify({"error": "Robot arm not initialized"}), 500
-        
-    try:
-        status = {
-            "coords": arm.get_coords(),
-            "angles": arm.get_angles(),
-            "gripper": arm.get_gripper_value(),
-            "error_info": arm.get_error_information(),
-            "fresh_mode": arm.get_fresh_mode(),
-            "gripper_protect_current": arm.get_gripper_protect_current(),
-            "angles_coords": arm.get_angles_coords(),
-            "HTS_gripper_torque": arm.get_HTS_gripper_torque(),
-            "world_reference": arm.get_world_reference(),
-            "tool_reference": arm.get_tool_reference(),
-            "reference_frame": arm.get_reference_frame(),
-            "movement_type": arm.get_movement_type()
-        }
-        return jsonify(status)
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
-
-@app.route('/robot/move/coords', methods=['POST'])
-def move_coords():
-    """Move robot to specific coordinates"""
-    if not arm:
-        return jsonify({"error": "Robot arm not initialized"}), 500
-        
-    data = request.get_json()
-    if not data:
-        return jsonify({"error": "No JSON data provided"}), 400
-        
-    try:
-        coords = data.get('coords', [])
-        speed = data.get('speed', 50)
-        
-        if len(coords) != 6:
-            return jsonify({"error": "Coordinates must be a list of 6 values [x, y, z, rx, ry, rz]"}), 400
-            
-        arm.send_coords(coords, speed)
-        return jsonify({"success": True, "message": f"Moving to coordinates {coords} at speed {speed}"})
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
-
-@app.route('/robot/move/angles', methods=['POST'])
-def move_angles():
-    """Move robot to specific joint angles"""
-    if not arm:
-        return jsonify({"error": "Robot arm not initialized"}), 500
-        
-    data = request.get_json()
-    if not data:
-        return jsonify({"error": "No JSON data provided"}), 400
-        
-    try:
-        angles = data.get('angles', [])
-        speed = data.get('speed', 50)
-        
-        if len(angles) != 6:
-            return jsonify({"error": "Angles must be a list of 6 values [j1, j2, j3, j4, j5, j6]"}), 400
-            
-        arm.send_angles(angles, speed)
-        return jsonify({"success": True, "message": f"Moving to angles {angles} at speed {speed}"})
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
-
-@app.route('/robot/jog', methods=['POST'])
-def jog_joint():
-    """Jog a specific joint by increment"""
-    if not arm:
-        return jsonify({"error": "Robot arm not initialized"}), 500
-        
-    data = request.get_json()
-    if not data:
-        return jsonify({"error": "No JSON data provided"}), 400
-        
-    try:
-        joint_id = data.get('joint_id', 1)
-        increment = data.get('increment', 0)
-        speed = data.get('speed', 50)
-        
-        if joint_id < 1 or joint_id > 6:
-            return jsonify({"error": "Joint ID must be between 1 and 6"}), 400
-            
-        arm.jog_increment_angle(joint_id, increment, speed)
-        return jsonify({"success": True, "message": f"Jogging joint {joint_id} by {increment} degrees at speed {speed}"})
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
-
-@app.route('/robot/home', methods=['POST'])
-def go_home():
-    """Move robot to home position"""
-    if not arm:
-        return jsonify({"error": "Robot arm not initialized"}), 500
-        
-    # Accept JSON data but don't require it
-    data = request.get_json(silent=True) or {}
-        
-    try:
-        home_coords = [118.7, 83.8, 280.6, -86.04, -2.15, -55.0]
-        arm.send_coords(home_coords, 100)
-        return jsonify({"success": True, "message": "Moving to home position"})
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
-
-@app.route('/robot/gripper/open', methods=['POST'])
-def open_gripper():
-    """Open the gripper"""
-    if not arm:
-        return jsonify({"error": "Robot arm not initialized"}), 500
-        
-    data = request.get_json() or {}
-    speed = data.get('speed', 100)
-    
-    try:
-        arm.set_gripper_value(100, speed, 1)
-        return jsonify({"success": True, "message": f"Opening gripper at speed {speed}"})
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
-
-@app.route('/robot/gripper/close', methods=['POST'])
-def close_gripper():
-    """Close the gripper"""
-    if not arm:
-        return jsonify({"error": "Robot arm not initialized"}), 500
-        
-    data = request.get_json() or {}
-    speed = data.get('speed', 100)
-    
-    try:
-        arm.set_gripper_value(0, speed, 1)
-        return jsonify({"success": True, "message": f"Closing gripper at speed {speed}"})
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
-
-@app.route('/robot/shuffle', methods=['POST'])
-def shuffle():
-    """Perform shuffle movement"""
-    if not arm:
-        return jsonify({"error": "Robot arm not initialized"}), 500
-        
-    data = request.get_json() or {}
-    speed = data.get('speed', 50)
-    times = data.get('times', 2)
-    
-    try:
-        # Start shuffle in a separate thread to avoid blocking
-        def shuffle_movement():
-            arm.send_coords([100.0, 0, 170, -175, 15, -170], speed)
-            for i in range(times):
-                arm.send_coords([100.0, 0, 170, -175, 15, -170], speed)
-                time.sleep(0.1)
-                arm.send_coords([170.0, 0, 170, -175, 15, -170], speed)
-                time.sleep(0.1)
-        
-        shuffle_thread = threading.Thread(target=shuffle_movement)
-        shuffle_thread.daemon = True
-        shuffle_thread.start()
-        
-        return jsonify({"success": True, "message": f"Shuffling {times} times at speed {speed}"})
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
-
-@app.route('/robot/wave', methods=['POST'])
-def wave():
-    """Perform wave gesture"""
-    if not arm:
-        return jsonify({"error": "Robot arm not initialized"}), 500
-        
-    # Accept JSON data but don't require it
-    data = request.get_json(silent=True) or {}
-        
-    try:
-        def wave_movement():
-            start = [100, -8, -40, 0, -70, -100]
-            end = [105, 0, -40, 10, -30, -90]
-            for _ in range(3):
-                arm.send_angles(start, 100)
-                time.sleep(0.5)
-                arm.send_angles(end, 100)
-                time.sleep(0.5)
-        
-        wave_thread = threading.Thread(target=wave_movement)
-        wave_thread.daemon = True
-        wave_thread.start()
-        
-        return jsonify({"success": True, "message": "Performing wave gesture"})
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
-
-# Video Streaming API Endpoints
-
-@app.route('/video/stream/<camera_id>')
-def video_stream(camera_id):
-    """Stream video from specified camera"""
-    try:
-        # Handle both integer and string camera IDs
-        cam_id = int(camera_id) if camera_id.isdigit() else camera_id
-        return Response(generate_frames(cam_id), 
-                       mimetype='multipart/x-mixed-replace; boundary=frame')
-    except ValueError:
-        return jsonify({"error": "Invalid camera ID"}), 400
-
-@app.route('/video/frame/<camera_id>')
-def video_frame(camera_id):
-    """Get single frame from specified camera"""
-    try:
-        cam_id = int(camera_id) if camera_id.isdigit() else camera_id
-        cap = get_camera_stream(cam_id)
-        
-        if not cap:
-            return jsonify({"error": "Camera not available"}), 404
-            
-        with camera_lock:
-            success, frame = cap.read()
-            
-        if not success:
-            return jsonify({"error": "Failed to capture frame"}), 500
-            
-        ret, buffer = cv2.imencode('.jpg', frame)
-        if not ret:
-            return jsonify({"error": "Failed to encode frame"}), 500
-            
-        return Response(buffer.tobytes(), mimetype='image/jpeg')
-    except ValueError:
-        return jsonify({"error": "Invalid camera ID"}), 400
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
-
-@app.route('/video/cameras', methods=['GET'])
-def list_cameras():
-    """List available cameras"""
-    available_cameras = []
-    
-    # Check common camera indices
-    for i in range(5):
-        try:
-            cap = cv2.VideoCapture(i)
-            if cap.isOpened():
-                available_cameras.append(i)
-            cap.release()
-        except Exception:
-            continue
-    
-    # Check common device paths
-    device_paths = ['/dev/video0', '/dev/video1', '/dev/video2', '/dev/video3', '/dev/video4']
-    for path in device_paths:
-        if os.path.exists(path):
-            available_cameras.append(path)
-    
-    return jsonify({"cameras": available_cameras})
+# Longest pause a batch "sleep" operation may request
+MAX_BATCH_SLEEP = 10.0
+
+core = Blueprint('core', __name__)
+metrics = MetricsRegistry()
+
+# Subsystem modules loaded by create_app(), keyed by subsystem name
+subsystems = {}
+startup = {}
+profiling = None
+
+def load_config(path='config.yaml'):
+    """Load the YAML configuration file"""
+    with open(path, 'r') as f:
+        return yaml.safe_load(f)
+
+def load_subsystem(name, config, device_client=None):
+    """Import a subsystem and its heavy dependencies, returning its blueprint"""
+    if name == 'robot':
+        import robot_api
+        subsystems['robot'] = robot_api
+        return robot_api.init_robot(config, metrics, device_client)
+    if name == 'video':
+        import video_api
+        subsystems['video'] = video_api
+        return video_api.init_video(config, metrics, shared=device_client is not None)
+    if name == 'vision':
+        import vision_api
+        subsystems['vision'] = vision_api
+        return vision_api.init_vision(config, metrics, device_client)
+    raise ValueError(f"Unknown subsystem: {name}")
+
+def create_app(role=None, config=None, device_client=None):
+    """Build the API app with only the subsystems the role needs
+
+    With a device_client the app runs as an HTTP worker: devices belong to
+    the device owner process (see serve_multiprocess).
+    """
+    if config is None:
+        config = load_config()
+    role = role or config.get('api', {}).get('role', 'all')
+    if role not in ROLES:
+        raise ValueError(f"Role must be one of {', '.join(ROLES)}")
+
+    global profiling
+    app = Flask(__name__)
+    app.register_blueprint(core)
+    profiling = Profiling(config.get('profiling', {}))
+    if profiling.enabled:
+        install_flask(app, profiling)
+    for name in ROLES[role]:
+        app.register_blueprint(load_subsystem(name, config, device_client))
+
+    startup.update({
+        "role": role,
+        "startup_seconds": round(time.perf_counter() - STARTUP_BEGAN, 3),
+        "startup_rss_bytes": process_rss_bytes()
+    })
+    print(f"API role '{role}' ready in {startup['startup_seconds']:.3f}s, "
+          f"RSS {startup['startup_rss_bytes'] / 1e6:.1f} MB")
+    return app
+
+# Request instrumentation
+
+requests_in_flight = metrics.gauge('http_requests_in_flight', 'HTTP requests being handled')
+
+@core.before_app_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    requests_in_flight.inc()
+
+@core.after_app_request
+def record_request_timing(response):
+    start = g.get('request_start')
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.histogram('http_request_duration_seconds', 'Time to produce a response',
+                          {'route': route, 'method': request.method,
+                           'status': response.status_code}).observe(time.perf_counter() - start)
+    return response
+
+@core.teardown_app_request
+def finish_request(exc):
+    if g.pop('request_start', None) is not None:
+        requests_in_flight.dec()
 
 # Health check endpoint
-@app.route('/health', methods=['GET'])
+@core.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({
+    health = {
         "status": "healthy",
-        "robot_connected": arm is not None,
+        "role": startup.get("role"),
+        "startup_seconds": startup.get("startup_seconds"),
+        "rss_bytes": process_rss_bytes(),
         "timestamp": time.time()
+    }
+    if 'robot' in subsystems:
+        health.update(subsystems['robot'].robot_health())
+    if 'video' in subsystems:
+        health.update(subsystems['video'].video_health())
+    if 'vision' in subsystems:
+        health.update(subsystems['vision'].vision_health())
+    return jsonify(health)
+
+# Metrics endpoint
+@core.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus metrics"""
+    metrics.gauge('process_resident_memory_bytes', 'Resident set size').set(process_rss_bytes())
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+def run_batch_operation(operation):
+    """Dispatch one batch operation to its route in-process; returns (status, data)
+
+    method defaults to POST when the operation has a body and GET otherwise,
+    so body-less POSTs such as /robot/home must name their method. POSTs
+    without a body send {}, as the client.py proxy does.
+    """
+    if 'sleep' in operation:
+        seconds = float(operation['sleep'])
+        if not 0 <= seconds <= MAX_BATCH_SLEEP:
+            return 400, {"error": f"Sleep must be between 0 and {MAX_BATCH_SLEEP} seconds"}
+        time.sleep(seconds)
+        return 200, {"slept": seconds}
+
+    path = operation.get('path', '')
+    body = operation.get('body')
+    method = operation.get('method', 'POST' if body is not None else 'GET').upper()
+    if body is None and method == 'POST':
+        body = {}
+    if not path.startswith('/'):
+        return 400, {"error": "Operation path must start with '/'"}
+    if path.split('?')[0] == '/batch' or path.startswith('/video/stream'):
+        return 400, {"error": f"{path} cannot be batched"}
+
+    try:
+        endpoint, view_args = current_app.url_map.bind('localhost').match(
+            path.split('?')[0], method)
+    except HTTPException as e:
+        return e.code, {"error": e.description}
+
+    # A fresh app context gives the operation its own g, so its teardown
+    # cannot pop the /batch request's timer or profiling trace
+    with current_app.app_context(), \
+            current_app.test_request_context(path, method=method, json=body):
+        try:
+            rv = current_app.view_functions[endpoint](**view_args)
+        except HTTPException as e:
+            # e.g. 415 from a view reading a JSON body the operation left out
+            return e.code, {"error": e.description}
+        response = current_app.make_response(rv)
+        if response.is_json:
+            return response.status_code, response.get_json()
+        return response.status_code, {"content_type": response.mimetype,
+                                      "bytes": response.content_length}
+
+# Batch endpoint
+@core.route('/batch', methods=['POST'])
+def batch():
+    """Run a list of API operations in order in one round trip"""
+    data = request.get_json(silent=True) or {}
+    operations = data.get('operations')
+    on_error = data.get('on_error', 'stop')
+    if not isinstance(operations, list) or not operations:
+        return jsonify({"error": "operations must be a non-empty list"}), 400
+    if on_error not in ('stop', 'continue'):
+        return jsonify({"error": "on_error must be 'stop' or 'continue'"}), 400
+
+    started = time.perf_counter()
+    results = []
+    for index, operation in enumerate(operations):
+        op_started = time.perf_counter()
+        try:
+            if not isinstance(operation, dict):
+                raise ValueError("Operation must be an object")
+            status, result = run_batch_operation(operation)
+        except Exception as e:
+            status, result = 500, {"error": str(e)}
+        ok = 200 <= status < 300
+        results.append({
+            "index": index,
+            "path": operation.get('path') if isinstance(operation, dict) else None,
+            "status": status,
+            "ok": ok,
+            "data": result,
+            "elapsed_ms": round((time.perf_counter() - op_started) * 1000, 3)
+        })
+        if not ok and on_error == 'stop':
+            break
+
+    return jsonify({
+        "success": all(result["ok"] for result in results) and len(results) == len(operations),
+        "completed": len(results),
+        "total": len(operations),
+        "results": results,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 3)
     })
 
 # API documentation endpoint
-@app.route('/api/docs', methods=['GET'])
+@core.route('/api/docs', methods=['GET'])
 def api_docs():
     """API documentation"""
-    docs = {
-        "robot_endpoints": {
-            "GET /robot/status": "Get current robot status",
-            "POST /robot/move/coords": "Move to coordinates {coords: [x,y,z,rx,ry,rz], speed: int}",
-            "POST /robot/move/angles": "Move to joint angles {angles: [j1,j2,j3,j4,j5,j6], speed: int}",
-            "POST /robot/jog": "Jog joint {joint_id: int, increment: float, speed: int}",
-            "POST /robot/home": "Move to home position",
-            "POST /robot/gripper/open": "Open gripper {speed: int}",
-            "POST /robot/gripper/close": "Close gripper {speed: int}",
-            "POST /robot/shuffle": "Shuffle movement {speed: int, times: int}",
-            "POST /robot/wave": "Wave gesture"
-        },
-        "video_endpoints": {
-            "GET /video/stream/<camera_id>": "Stream video from camera (MJPEG)",
-            "GET /video/frame/<camera_id>": "Get single frame from camera (JPEG)",
-            "GET /video/cameras": "List available cameras"
-        },
-        "utility_endpoints": {
-            "GET /health": "Health check",
-            "GET /api/docs": "API documentation"
-        }
+    docs = {}
+    if 'robot' in subsystems:
+        docs["robot_endpoints"] = subsystems['robot'].ROBOT_DOCS
+    if 'video' in subsystems:
+        docs["video_endpoints"] = subsystems['video'].VIDEO_DOCS
+    if 'vision' in subsystems:
+        docs["vision_endpoints"] = subsystems['vision'].VISION_DOCS
+    if profiling is not None and profiling.enabled:
+        docs["debug_endpoints"] = PROFILING_DOCS
+    docs["utility_endpoints"] = {
+        "GET /health": "Health check (role, startup time, RSS, robot connection)",
+        "GET /metrics": "Prometheus metrics (arm, camera and request latencies)",
+        "GET /api/docs": "API documentation",
+        "POST /batch": "Run operations in order {operations: [{path, method, body} | {sleep: seconds}], on_error: stop|continue}; method defaults to POST with a body, else GET; POSTs without a body send {}"
     }
     return jsonify(docs)
 
+def serve_multiprocess(config, role, host, port, workers):
+    """Serve from several HTTP worker processes sharing one device owner
+
+    The device owner opens the cameras and the arm. Workers read camera
+    frames from its shared-memory rings and forward arm calls to it over a
+    local socket. All workers accept on the same listening socket.
+    """
+    import multiprocessing
+    import socket
+    from werkzeug.serving import make_server
+    from device_owner import DeviceClient, run_device_owner
+
+    ctx = multiprocessing.get_context('fork')
+    address = config.get('api', {}).get('device_socket', '/tmp/adum-device.sock')
+    authkey = os.urandom(16)
+    ready = ctx.Event()
+    owner = ctx.Process(target=run_device_owner, name='device-owner',
+                        args=(config, role, ROLES[role], address, authkey, ready))
+    # Stop the workers and the device owner when asked to exit
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    owner.start()
+    processes = []
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        if not ready.wait(30):
+            raise RuntimeError("Device owner did not start")
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host, port))
+        sock.listen(128)
+
+        def serve_worker():
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            app = create_app(role, config, DeviceClient(address, authkey))
+            make_server(host, port, app, threaded=True, fd=sock.fileno()).serve_forever()
+
+        processes = [ctx.Process(target=serve_worker, name=f'http-worker-{i}')
+                     for i in range(workers)]
+        for process in processes:
+            process.start()
+        print(f"Serving on {host}:{port} with {workers} workers, device owner pid {owner.pid}")
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes + [owner]:
+            process.terminate()
+            process.join(5)
+        sock.close()
+
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=8044, debug=True)
+    parser = argparse.ArgumentParser(description="mechArm270 API server")
+    parser.add_argument('--role', choices=sorted(ROLES),
+                        help="Subsystems to serve (default: api.role from config, else all)")
+    parser.add_argument('--config', default='config.yaml', help="Path to config.yaml")
+    parser.add_argument('--workers', type=int,
+                        help="HTTP worker processes (default: api.workers from config, else 0)")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    api_config = config.get('api', {})
+    role = args.role or api_config.get('role', 'all')
+    port = api_config.get('port', 8044)
+    workers = args.workers if args.workers is not None else api_config.get('workers', 0)
+    if workers > 0:
+        serve_multiprocess(config, role, '0.0.0.0', port, workers)
+    else:
+        app = create_app(role, config)
+        debug = api_config.get('debug', False)
+        # Exit normally on SIGTERM so frame rings and the vision pool are cleaned up
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        # With the reloader, only the child process that serves requests owns the port
+        if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+            if 'robot' in subsystems:
+                subsystems['robot'].arm_supervisor.start()
+            if 'video' in subsystems:
+                subsystems['video'].start_capture()
+            if 'vision' in subsystems:
+                subsystems['vision'].start_vision()
+        app.run(host='0.0.0.0', port=port, debug=debug)
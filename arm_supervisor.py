@@ -0,0 +1,158 @@
+import random
+import threading
+import time
+
+DISCONNECTED = 'disconnected'
+CONNECTING = 'connecting'
+CONNECTED = 'connected'
+BACKOFF = 'backoff'
+
+
+def _is_bad_reading(method, result):
+    # pymycobot reports read timeouts by returning None or -1 instead of raising
+    return method.startswith('get_') and (result is None or result == -1)
+
+
+class ArmSupervisor:
+    """Owns the arm connection and keeps it alive
+
+    Connects lazily on a background thread, treats repeated failing or slow
+    calls as a dead link, and reconnects with exponential backoff while the
+    HTTP server keeps serving. Routes call get() and never block on the port.
+    """
+
+    def __init__(self, factory, probe_interval=5.0, probe_timeout=1.0,
+                 failure_threshold=3, backoff_initial=0.5, backoff_max=30.0):
+        self.factory = factory
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self.failure_threshold = failure_threshold
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+
+        self.state = DISCONNECTED
+        self.connects = 0
+        self.reconnects = 0
+        self.consecutive_failures = 0
+        self.last_error = None
+        self.connected_since = None
+
+        self._arm = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._last_ok = 0.0
+
+    @property
+    def connected(self):
+        return self.state == CONNECTED
+
+    def start(self):
+        """Start the supervisor thread if it is not already running"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='arm-supervisor')
+                self._thread.daemon = True
+                self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+
+    def get(self):
+        """Return the connected arm, or None while (re)connecting"""
+        if self._thread is None:
+            self.start()
+        return self._arm if self.state == CONNECTED else None
+
+    def status(self):
+        return {
+            "state": self.state,
+            "connects": self.connects,
+            "reconnects": self.reconnects,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+            "connected_since": self.connected_since,
+        }
+
+    def observe_call(self, method, args, kwargs, result, error, started, latency):
+        """Call listener for InstrumentedArm: feeds link health from real traffic"""
+        if error is not None:
+            self.report_failure(f"{method}: {error}")
+        elif _is_bad_reading(method, result):
+            self.report_failure(f"{method}: no reply")
+        elif latency > self.probe_timeout:
+            self.report_failure(f"{method}: reply took {latency:.3f}s")
+        else:
+            self.consecutive_failures = 0
+            self._last_ok = time.monotonic()
+
+    def report_failure(self, reason):
+        self.last_error = reason
+        self.consecutive_failures += 1
+        if self.state == CONNECTED and self.consecutive_failures >= self.failure_threshold:
+            self._wake.set()
+
+    def _connect(self):
+        self.state = CONNECTING
+        try:
+            arm = self.factory()
+        except Exception as e:
+            self.last_error = f"connect: {e}"
+            print(f"Error initializing robot arm: {e}")
+            return False
+        self._arm = arm
+        self.consecutive_failures = 0
+        self._last_ok = time.monotonic()
+        self.connected_since = time.time()
+        if self.connects:
+            self.reconnects += 1
+        self.connects += 1
+        self.state = CONNECTED
+        print("Robot arm initialized successfully.")
+        return True
+
+    def _disconnect(self):
+        arm, self._arm = self._arm, None
+        self.state = DISCONNECTED
+        self.connected_since = None
+        close = getattr(arm, 'close', None)
+        if close is not None:
+            try:
+                close()
+            except Exception:
+                pass
+
+    def _probe(self):
+        arm = self._arm
+        if arm is None:
+            return
+        try:
+            # Goes through the instrumented arm, so observe_call sees the result
+            arm.get_angles()
+        except Exception:
+            pass
+
+    def _run(self):
+        delay = self.backoff_initial
+        while not self._stopped.is_set():
+            if self.state != CONNECTED:
+                if self._connect():
+                    delay = self.backoff_initial
+                    continue
+                self.state = BACKOFF
+                # Full jitter so several nodes do not hammer a shared bus in lockstep
+                self._stopped.wait(random.uniform(0, delay))
+                delay = min(delay * 2, self.backoff_max)
+                continue
+
+            self._wake.wait(self.probe_interval)
+            self._wake.clear()
+            if self._stopped.is_set():
+                break
+            if self.consecutive_failures >= self.failure_threshold:
+                print(f"Robot arm link lost ({self.last_error}), reconnecting")
+                self._disconnect()
+            elif time.monotonic() - self._last_ok >= self.probe_interval:
+                self._probe()
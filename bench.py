@@ -0,0 +1,408 @@
+import argparse
+import copy
+import json
+import os
+import platform
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import numpy as np
+import requests
+import yaml
+from video_relay import parse_mjpeg
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Workloads in the order they run; each gets a fresh measurement window
+WORKLOADS = ['status_storm', 'jog_burst', 'frame_poll', 'mjpeg_viewers', 'proxy_calls']
+
+# GET endpoints proxied through client.py by proxy_calls
+PROXY_ENDPOINTS = ['robot/status', 'health', 'video/cameras', 'api/docs']
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+
+
+def bench_config(config, args):
+    """config.yaml with stand-in backends and local ports for one benchmark run"""
+    config = copy.deepcopy(config)
+    api = config.setdefault('api', {})
+    api.update({
+        'port': args.api_port,
+        'base_url': f'http://127.0.0.1:{args.api_port}',
+        'workers': args.api_workers,
+        'debug': False,
+    })
+    client = config.setdefault('client', {})
+    client.update({'host': '127.0.0.1', 'port': args.client_port, 'debug': False,
+                   'mode': args.client_mode})
+    config.setdefault('robot', {})['backend'] = 'simulated'
+    config.setdefault('video', {})['backend'] = 'simulated'
+    return config
+
+
+class ServerProcess:
+    """A server under test, with CPU and RSS accounting over its process tree"""
+
+    def __init__(self, name, argv, cwd, ready_url):
+        self.name = name
+        self.argv = argv
+        self.cwd = cwd
+        self.ready_url = ready_url
+        self.process = None
+        self.log_path = os.path.join(cwd, f'{name}.log')
+
+    def start(self, timeout=30.0):
+        env = dict(os.environ, PYTHONUNBUFFERED='1')
+        with open(self.log_path, 'w') as log:
+            self.process = subprocess.Popen(self.argv, cwd=self.cwd, env=env,
+                                            stdout=log, stderr=subprocess.STDOUT)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                break
+            try:
+                if requests.get(self.ready_url, timeout=1).status_code < 500:
+                    return
+            except requests.RequestException:
+                pass
+            time.sleep(0.2)
+        self.stop()
+        with open(self.log_path) as log:
+            raise RuntimeError(f"{self.name} did not start:\n{log.read()[-2000:]}")
+
+    def pids(self):
+        """The server's pid and those of every descendant (workers, device owner)"""
+        parents = {}
+        for entry in os.listdir('/proc'):
+            if entry.isdigit():
+                try:
+                    with open(f'/proc/{entry}/stat') as f:
+                        # The command name may contain spaces; fields resume after ')'
+                        fields = f.read().rsplit(')', 1)[1].split()
+                    parents.setdefault(int(fields[1]), []).append(int(entry))
+                except (OSError, IndexError):
+                    continue
+        pids, pending = [], [self.process.pid]
+        while pending:
+            pid = pending.pop()
+            pids.append(pid)
+            pending.extend(parents.get(pid, []))
+        return pids
+
+    def cpu_seconds(self):
+        total = 0
+        for pid in self.pids():
+            try:
+                with open(f'/proc/{pid}/stat') as f:
+                    fields = f.read().rsplit(')', 1)[1].split()
+                total += int(fields[11]) + int(fields[12])
+            except (OSError, IndexError):
+                continue
+        return total / CLOCK_TICKS
+
+    def rss_bytes(self):
+        # Summed over processes, so pages shared after fork are counted per worker
+        total = 0
+        for pid in self.pids():
+            try:
+                with open(f'/proc/{pid}/statm') as f:
+                    total += int(f.read().split()[1]) * PAGE_SIZE
+            except (OSError, IndexError):
+                continue
+        return total
+
+    def stop(self):
+        if self.process is None or self.process.poll() is not None:
+            return
+        self.process.send_signal(signal.SIGTERM)
+        try:
+            self.process.wait(10)
+        except subprocess.TimeoutExpired:
+            for pid in reversed(self.pids()):
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except OSError:
+                    pass
+            self.process.wait()
+
+
+class Recorder:
+    """Latencies and errors collected by the load threads of one workload"""
+
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+
+    def time(self, call):
+        """Run call(), record its latency, and count exceptions and non-2xx replies"""
+        start = time.perf_counter()
+        try:
+            response = call()
+        except requests.RequestException:
+            with self._lock:
+                self.errors += 1
+            return None
+        self.record(time.perf_counter() - start, response.ok, len(response.content))
+        return response
+
+    def record(self, latency, ok=True, size=0):
+        with self._lock:
+            if ok:
+                self.latencies.append(latency)
+                self.bytes += size
+            else:
+                self.errors += 1
+
+    def summary(self, elapsed):
+        latencies = np.array(self.latencies) * 1000
+        summary = {
+            "requests": len(self.latencies),
+            "errors": self.errors,
+            "throughput_per_s": round(len(self.latencies) / elapsed, 2),
+            "mb_per_s": round(self.bytes / elapsed / 1e6, 3),
+        }
+        if len(latencies):
+            summary.update({
+                "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+                "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+                "max_ms": round(float(latencies.max()), 3),
+            })
+        return summary
+
+
+# Workloads: each returns the list of load-thread targets, called as target(stop)
+
+def status_storm(bench, recorder):
+    """Concurrent clients polling /robot/status as fast as it answers"""
+    def run(stop):
+        session = requests.Session()
+        while not stop.is_set():
+            recorder.time(lambda: session.get(f'{bench.api}/robot/status', timeout=10))
+    return [run] * bench.args.concurrency
+
+
+def jog_burst(bench, recorder):
+    """Bursts of back-to-back jog commands once a second, alternating direction"""
+    def run(stop):
+        session = requests.Session()
+        direction = 1
+        while not stop.is_set():
+            burst_start = time.monotonic()
+            for _ in range(bench.args.burst):
+                body = {"joint_id": 1, "increment": direction, "speed": 50}
+                recorder.time(lambda: session.post(f'{bench.api}/robot/jog', json=body, timeout=10))
+                direction = -direction
+            stop.wait(max(0.0, 1.0 - (time.monotonic() - burst_start)))
+    return [run]
+
+
+def frame_poll(bench, recorder):
+    """One client per camera fetching /video/frame at 10 Hz"""
+    def poller(camera_id):
+        def run(stop):
+            session = requests.Session()
+            next_at = time.monotonic()
+            while not stop.is_set():
+                recorder.time(lambda: session.get(f'{bench.api}/video/frame/{camera_id}',
+                                                  timeout=10))
+                next_at += 0.1
+                stop.wait(max(0.0, next_at - time.monotonic()))
+        return run
+    return [poller(camera['id']) for camera in bench.cameras]
+
+
+def mjpeg_viewers(bench, recorder):
+    """Viewers per camera on client.py's relayed MJPEG streams; latency is the frame interval"""
+    def viewer(camera_id):
+        def run(stop):
+            try:
+                response = requests.get(f'{bench.client}/video/stream/{camera_id}',
+                                        stream=True, timeout=10)
+            except requests.RequestException:
+                recorder.record(0, ok=False)
+                return
+            with response:
+                last = time.perf_counter()
+                for _, payload in parse_mjpeg(response.iter_content(64 * 1024)):
+                    now = time.perf_counter()
+                    recorder.record(now - last, size=len(payload))
+                    last = now
+                    if stop.is_set():
+                        break
+        return run
+    return [viewer(camera['id']) for camera in bench.cameras for _ in range(bench.args.viewers)]
+
+
+def proxy_calls(bench, recorder):
+    """GETs proxied through client.py's /api, cycling over a few endpoints"""
+    def run(stop):
+        session = requests.Session()
+        calls = 0
+        while not stop.is_set():
+            endpoint = PROXY_ENDPOINTS[calls % len(PROXY_ENDPOINTS)]
+            recorder.time(lambda: session.get(f'{bench.client}/api/{endpoint}', timeout=10))
+            calls += 1
+    return [run] * bench.args.concurrency
+
+
+class Benchmark:
+    """Starts api.py and client.py on stand-in backends and runs the workloads"""
+
+    def __init__(self, config, args, workdir):
+        self.args = args
+        self.config = bench_config(config, args)
+        self.cameras = self.config.get('cameras', [])
+        self.api = self.config['api']['base_url']
+        self.client = f'http://127.0.0.1:{args.client_port}'
+        # client.py reads config.yaml from its working directory
+        with open(os.path.join(workdir, 'config.yaml'), 'w') as f:
+            yaml.safe_dump(self.config, f)
+        self.servers = [
+            ServerProcess('api', [sys.executable, os.path.join(BASE_DIR, 'api.py'),
+                                  '--config', 'config.yaml'],
+                          workdir, f'{self.api}/health'),
+            ServerProcess('client', [sys.executable, os.path.join(BASE_DIR, 'client.py')],
+                          workdir, f'{self.client}/proxy/stats'),
+        ]
+
+    def start(self):
+        for server in self.servers:
+            server.start()
+
+    def stop(self):
+        for server in reversed(self.servers):
+            server.stop()
+
+    def run_workload(self, name):
+        recorder = Recorder()
+        targets = globals()[name](self, recorder)
+        stop = threading.Event()
+        threads = [threading.Thread(target=target, args=(stop,), daemon=True)
+                   for target in targets]
+
+        cpu_before = {server.name: server.cpu_seconds() for server in self.servers}
+        peak_rss = {server.name: server.rss_bytes() for server in self.servers}
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        while time.perf_counter() - started < self.args.duration:
+            time.sleep(0.2)
+            for server in self.servers:
+                peak_rss[server.name] = max(peak_rss[server.name], server.rss_bytes())
+        stop.set()
+        elapsed = time.perf_counter() - started
+        for thread in threads:
+            thread.join(10)
+
+        result = recorder.summary(elapsed)
+        result["threads"] = len(threads)
+        for server in self.servers:
+            cpu = server.cpu_seconds() - cpu_before[server.name]
+            result[server.name] = {
+                "cpu_seconds": round(cpu, 3),
+                "cpu_percent": round(100 * cpu / elapsed, 1),
+                "peak_rss_mb": round(peak_rss[server.name] / 1e6, 1),
+            }
+        return result
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'describe', '--always', '--dirty'],
+                                       cwd=BASE_DIR, stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline, results):
+    """Print the relative change of every workload figure against a baseline file"""
+    for name, current in results['workloads'].items():
+        previous = baseline.get('workloads', {}).get(name)
+        if previous is None:
+            continue
+        print(f"{name}:")
+        for key in ('throughput_per_s', 'p50_ms', 'p99_ms'):
+            if key in current and previous.get(key):
+                change = (current[key] - previous[key]) / previous[key] * 100
+                print(f"  {key:18} {previous[key]:>10} -> {current[key]:>10} ({change:+.1f}%)")
+        for server in ('api', 'client'):
+            old, new = previous.get(server, {}), current[server]
+            print(f"  {server + ' cpu %':18} {old.get('cpu_percent'):>10} -> {new['cpu_percent']:>10}")
+            print(f"  {server + ' rss MB':18} {old.get('peak_rss_mb'):>10} -> {new['peak_rss_mb']:>10}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="End-to-end benchmark of api.py and client.py")
+    parser.add_argument('--config', default='config.yaml', help="Base config.yaml")
+    parser.add_argument('--output', default='bench_results.json', help="Results file to write")
+    parser.add_argument('--compare', help="Earlier results file to compare against")
+    parser.add_argument('--workloads', default=','.join(WORKLOADS),
+                        help=f"Comma-separated subset of: {', '.join(WORKLOADS)}")
+    parser.add_argument('--duration', type=float, default=10.0, help="Seconds per workload")
+    parser.add_argument('--quick', action='store_true', help="Two seconds per workload")
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help="Client threads for status_storm and proxy_calls")
+    parser.add_argument('--viewers', type=int, default=4, help="MJPEG viewers per camera")
+    parser.add_argument('--burst', type=int, default=10, help="Jog commands per burst")
+    parser.add_argument('--api-workers', type=int, default=0, help="api.py --workers")
+    parser.add_argument('--client-mode', choices=['threaded', 'gateway'], default='threaded')
+    parser.add_argument('--api-port', type=int, default=18044)
+    parser.add_argument('--client-port', type=int, default=18055)
+    parser.add_argument('--check', action='store_true',
+                        help="Exit non-zero if a workload failed or exceeded --max-error-rate")
+    parser.add_argument('--max-error-rate', type=float, default=0.01)
+    args = parser.parse_args()
+    if args.quick:
+        args.duration = 2.0
+    names = [name.strip() for name in args.workloads.split(',') if name.strip()]
+    unknown = set(names) - set(WORKLOADS)
+    if unknown:
+        parser.error(f"Unknown workloads: {', '.join(sorted(unknown))}")
+
+    with open(args.config) as f:
+        config = yaml.safe_load(f)
+
+    results = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "settings": {key: getattr(args, key) for key in
+                     ('duration', 'concurrency', 'viewers', 'burst', 'api_workers', 'client_mode')},
+        "workloads": {}
+    }
+    failed = []
+    with tempfile.TemporaryDirectory(prefix='adum-bench-') as workdir:
+        bench = Benchmark(config, args, workdir)
+        bench.start()
+        try:
+            for name in names:
+                print(f"Running {name} for {args.duration:g}s...")
+                result = results["workloads"][name] = bench.run_workload(name)
+                total = result["requests"] + result["errors"]
+                print(f"  {result['throughput_per_s']}/s, p50 {result.get('p50_ms')} ms, "
+                      f"p99 {result.get('p99_ms')} ms, errors {result['errors']}, "
+                      f"api cpu {result['api']['cpu_percent']}%, "
+                      f"client cpu {result['client']['cpu_percent']}%")
+                if not result["requests"] or result["errors"] > args.max_error_rate * total:
+                    failed.append(name)
+        finally:
+            bench.stop()
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write('\n')
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), results)
+    if args.check and failed:
+        print(f"Failed workloads: {', '.join(failed)}")
+        sys.exit(1)
@@ -0,0 +1,110 @@
+import gzip
+import hashlib
+import os
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE_DIR = os.path.join(BASE_DIR, 'templates')
+STATIC_DIR = os.path.join(BASE_DIR, 'static')
+
+# Hashed asset URLs never change content, so browsers may keep them for a year
+IMMUTABLE = 'public, max-age=31536000, immutable'
+# The page itself is revalidated on every load and answered with 304 when unchanged
+REVALIDATE = 'no-cache'
+
+
+def _accepted_encodings(accept_encoding):
+    """Accept-Encoding as {coding: q}; q=0 marks a coding the client refuses"""
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        coding, *params = [item.strip() for item in part.split(';')]
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding.lower()] = q
+    return accepted
+
+
+class Asset:
+    """A response body built once, with precompressed variants and an ETag"""
+
+    def __init__(self, body, content_type, cache_control):
+        self.body = body
+        self.content_type = content_type
+        self.cache_control = cache_control
+        self.digest = hashlib.sha256(body).hexdigest()[:16]
+        self.etag = f'"{self.digest}"'
+        self.encoded = {'gzip': gzip.compress(body, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            self.encoded['br'] = brotli.compress(body, quality=11)
+
+    def negotiate(self, accept_encoding):
+        """Pick the smallest encoding the client accepts; returns (body, encoding)"""
+        accepted = _accepted_encodings(accept_encoding)
+        best = (self.body, None)
+        for encoding, body in self.encoded.items():
+            if accepted.get(encoding, accepted.get('*', 0)) > 0 and len(body) < len(best[0]):
+                best = (body, encoding)
+        return best
+
+    def respond(self, if_none_match, accept_encoding):
+        """Framework-neutral response: (status, headers, body)"""
+        headers = {
+            'ETag': self.etag,
+            'Cache-Control': self.cache_control,
+            'Vary': 'Accept-Encoding',
+        }
+        if if_none_match and self.etag in [tag.strip() for tag in if_none_match.split(',')]:
+            return 304, headers, b''
+        body, encoding = self.negotiate(accept_encoding)
+        headers['Content-Type'] = self.content_type
+        if encoding:
+            headers['Content-Encoding'] = encoding
+        return 200, headers, body
+
+
+class Dashboard:
+    """The control interface: page shell plus content-hashed CSS and JS
+
+    Everything is rendered and compressed once at startup. The page only
+    depends on config.yaml, which does not change while the server runs.
+    """
+
+    def __init__(self, api_base, cameras):
+        self.assets = {}
+        css_url = self._add_static('dashboard.css', 'text/css; charset=utf-8')
+        js_url = self._add_static('dashboard.js', 'application/javascript; charset=utf-8')
+
+        env = Environment(loader=FileSystemLoader(TEMPLATE_DIR),
+                          autoescape=select_autoescape(['html']))
+        html = env.get_template('dashboard.html').render(
+            api_base=api_base, cameras=cameras, css_url=css_url, js_url=js_url)
+        self.page = Asset(html.encode('utf-8'), 'text/html; charset=utf-8', REVALIDATE)
+
+    def _add_static(self, filename, content_type):
+        with open(os.path.join(STATIC_DIR, filename), 'rb') as f:
+            asset = Asset(f.read(), content_type, IMMUTABLE)
+        stem, ext = os.path.splitext(filename)
+        name = f'{stem}.{asset.digest}{ext}'
+        self.assets[name] = asset
+        return f'/assets/{name}'
+
+    def sizes(self):
+        """Byte sizes of every asset and encoding, for logging"""
+        sizes = {}
+        for name, asset in [('page', self.page)] + list(self.assets.items()):
+            sizes[name] = dict({'identity': len(asset.body)},
+                               **{enc: len(body) for enc, body in asset.encoded.items()})
+        return sizes
@@ -0,0 +1,289 @@
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+from multiprocessing.connection import Listener, Client
+
+
+class DeviceUnavailable(Exception):
+    """The device owner is running but the requested device is not connected"""
+
+
+class RemoteCallError(Exception):
+    """A forwarded call raised in the device owner"""
+
+
+# Source label a worker sent with the call being served on this thread
+_caller = threading.local()
+
+
+def caller_source():
+    """Route or thread in the worker that made the call being served, if any"""
+    return getattr(_caller, 'source', None)
+
+
+class CameraPublisher:
+    """Captures one camera continuously and publishes frames to its shared-memory ring"""
+
+    def __init__(self, camera_id, open_capture, slots=4, reopen_delay=2.0):
+        self.camera_id = camera_id
+        self.open_capture = open_capture
+        self.slots = slots
+        self.reopen_delay = reopen_delay
+        self.writer = None
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'camera-{camera_id}')
+        self._thread.daemon = True
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _run(self):
+        import cv2
+        from frame_ring import FrameRingWriter, ring_name
+
+        reported = False
+        while not self._stopped.is_set():
+            cap = self.open_capture(self.camera_id)
+            if not cap.isOpened():
+                # Keep retrying quietly; cameras may be plugged in later
+                if not reported:
+                    print(f"Error opening camera {self.camera_id}")
+                    reported = True
+                self._stopped.wait(self.reopen_delay)
+                continue
+            reported = False
+            try:
+                while not self._stopped.is_set():
+                    success, frame = cap.read()
+                    if not success:
+                        break
+                    timestamp = time.time()
+                    if self.writer is None:
+                        self.writer = FrameRingWriter(ring_name(self.camera_id), frame.shape,
+                                                      frame.dtype, self.slots)
+                    if frame.shape != self.writer.shape:
+                        # Readers have mapped the ring for the first frame's shape
+                        frame = cv2.resize(frame, (self.writer.shape[1], self.writer.shape[0]))
+                    self.writer.publish(frame, timestamp)
+            except Exception as e:
+                print(f"Error capturing camera {self.camera_id}: {e}")
+            finally:
+                cap.release()
+            self._stopped.wait(self.reopen_delay)
+
+    def close(self):
+        self.stop()
+        # Let an in-progress publish finish before the segment goes away
+        if self._thread.is_alive():
+            self._thread.join(self.reopen_delay)
+        if self.writer is not None:
+            self.writer.unlink()
+
+
+class DeviceOwner:
+    """The one process that holds the cameras and the arm in multi-process mode"""
+
+    def __init__(self, config, role, subsystem_names, address, authkey):
+        self.config = config
+        self.role = role
+        self.subsystem_names = subsystem_names
+        self.address = address
+        self.authkey = authkey
+        self.objects = {}
+        self.publishers = []
+
+    def _start_devices(self):
+        from metrics import MetricsRegistry
+        if 'robot' in self.subsystem_names:
+            import robot_api
+            robot_api.init_robot(self.config, MetricsRegistry())
+            robot_api.arm_supervisor.start()
+            self.objects['telemetry'] = robot_api.telemetry
+            if robot_api.journal is not None:
+                self.objects['journal'] = robot_api.journal
+            self.arm_supervisor = robot_api.arm_supervisor
+        if 'video' in self.subsystem_names:
+            from video_api import create_capture
+            video_config = self.config.get('video', {})
+            slots = video_config.get('ring_slots', 4)
+            for camera in self.config.get('cameras', []):
+                publisher = CameraPublisher(
+                    camera['id'], lambda camera_id: create_capture(camera_id, video_config), slots)
+                publisher.start()
+                self.publishers.append(publisher)
+        if 'vision' in self.subsystem_names:
+            import vision_api
+            self.vision = vision_api.create_stage(self.config, MetricsRegistry())
+            self.vision.start()
+            self.objects['vision'] = self.vision
+
+    def owner_status(self):
+        status = {"pid": os.getpid(), "role": self.role}
+        if hasattr(self, 'arm_supervisor'):
+            status["robot_connected"] = self.arm_supervisor.connected
+            status["robot_connection"] = self.arm_supervisor.status()
+        return status
+
+    def _call(self, target, method, args, kwargs):
+        if target == 'owner':
+            if method != 'status':
+                raise AttributeError(method)
+            return self.owner_status()
+        if target == 'arm':
+            arm = self.arm_supervisor.get() if hasattr(self, 'arm_supervisor') else None
+            if arm is None:
+                raise DeviceUnavailable("Robot arm not connected")
+            obj = arm
+        else:
+            obj = self.objects.get(target)
+            if obj is None:
+                raise DeviceUnavailable(f"{target} is not available in role '{self.role}'")
+        if method.startswith('_'):
+            raise AttributeError(method)
+        return getattr(obj, method)(*args, **kwargs)
+
+    def _serve_connection(self, conn):
+        with conn:
+            while True:
+                try:
+                    target, method, args, kwargs, source = conn.recv()
+                except (EOFError, OSError):
+                    return
+                _caller.source = source
+                try:
+                    conn.send(('ok', self._call(target, method, args, kwargs)))
+                except DeviceUnavailable as e:
+                    conn.send(('unavailable', str(e)))
+                except Exception as e:
+                    conn.send(('error', f"{type(e).__name__}: {e}"))
+                finally:
+                    _caller.source = None
+
+    def serve_forever(self, ready=None):
+        """Open the devices and answer calls from workers until killed"""
+        self._start_devices()
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+        listener = Listener(self.address, family='AF_UNIX', authkey=self.authkey)
+        if ready is not None:
+            ready.set()
+        try:
+            while True:
+                conn = listener.accept()
+                thread = threading.Thread(target=self._serve_connection, args=(conn,))
+                thread.daemon = True
+                thread.start()
+        finally:
+            listener.close()
+            for publisher in self.publishers:
+                publisher.close()
+            if hasattr(self, 'arm_supervisor'):
+                self.arm_supervisor.stop()
+            if hasattr(self, 'vision'):
+                self.vision.stop()
+
+
+def run_device_owner(config, role, subsystem_names, address, authkey, ready):
+    """Process entry point for the device owner"""
+    # Exit through serve_forever's cleanup so the frame rings are unlinked
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        DeviceOwner(config, role, subsystem_names, address, authkey).serve_forever(ready)
+    except KeyboardInterrupt:
+        pass
+
+
+class DeviceClient:
+    """Forwards calls to the device owner over a pool of local connections
+
+    source, if set, is called on the calling thread and its label is sent
+    with each call, so the owner can attribute it (see caller_source).
+    """
+
+    def __init__(self, address, authkey, source=None):
+        self.address = address
+        self.authkey = authkey
+        self.source = source
+        # Request threads are short-lived, so connections are pooled rather than per thread
+        self._idle = queue.LifoQueue()
+
+    def call(self, target, method, *args, **kwargs):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = None
+        try:
+            if conn is None:
+                conn = Client(self.address, family='AF_UNIX', authkey=self.authkey)
+            conn.send((target, method, args, kwargs,
+                       self.source() if self.source is not None else None))
+            status, value = conn.recv()
+        except (EOFError, OSError) as e:
+            # Drop the broken connection; the next call opens a fresh one
+            if conn is not None:
+                conn.close()
+            raise DeviceUnavailable(f"Device owner unreachable: {e}")
+        self._idle.put(conn)
+        if status == 'ok':
+            return value
+        if status == 'unavailable':
+            raise DeviceUnavailable(value)
+        raise RemoteCallError(value)
+
+
+class RemoteObject:
+    """Proxy whose method calls run on an object in the device owner"""
+
+    def __init__(self, client, target):
+        self._client = client
+        self._target = target
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        def call(*args, **kwargs):
+            return self._client.call(self._target, name, *args, **kwargs)
+        return call
+
+
+class RemoteArmSupervisor:
+    """Worker-side stand-in for ArmSupervisor; the real one runs in the device owner"""
+
+    def __init__(self, client, arm, status_ttl=0.5):
+        self.client = client
+        self.arm = arm
+        self.status_ttl = status_ttl
+        self._status = {}
+        self._status_at = 0.0
+
+    def start(self):
+        pass
+
+    def _owner_status(self):
+        now = time.monotonic()
+        if now - self._status_at > self.status_ttl:
+            try:
+                self._status = self.client.call('owner', 'status')
+            except DeviceUnavailable as e:
+                self._status = {"robot_connected": False,
+                                "robot_connection": {"state": "owner_unreachable",
+                                                     "last_error": str(e)}}
+            self._status_at = now
+        return self._status
+
+    @property
+    def connected(self):
+        return self._owner_status().get('robot_connected', False)
+
+    def get(self):
+        return self.arm if self.connected else None
+
+    def status(self):
+        return self._owner_status().get('robot_connection', {})
@@ -0,0 +1,284 @@
+import re
+import struct
+import threading
+import time
+from collections import namedtuple
+from multiprocessing import shared_memory
+import numpy as np
+
+MAGIC = b'ADFR'
+VERSION = 1
+
+# magic, version, slots, ndim, shape (4 dims), dtype str, slot data size
+HEADER = struct.Struct('<4sHHI4I16sQ')
+# Sequence number of the newest complete frame; 0 until the first publish
+LATEST = struct.Struct('<Q')
+LATEST_OFFSET = 64
+# Per-slot sequence (0 while the writer is filling it), capture time, payload size
+SLOT = struct.Struct('<QdQ')
+ALIGN = 64
+
+Frame = namedtuple('Frame', 'seq timestamp data')
+
+# Held while _attach swaps out resource_tracker.register, and while rings are
+# created, so no other thread registers (or skips registering) a segment meanwhile
+_tracker_lock = threading.Lock()
+
+
+def _align(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+def ring_name(camera_id):
+    """Shared memory name of the frame ring for a camera"""
+    return 'adum_cam_' + re.sub(r'[^A-Za-z0-9]', '_', str(camera_id)).strip('_')
+
+
+def _attach(name):
+    """Attach to an existing segment without letting this process unlink it on exit"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+    # Python < 3.13 registers every attach with the resource tracker, which
+    # would unlink the ring when this reader exits; skip that registration
+    from multiprocessing import resource_tracker
+    with _tracker_lock:
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: (
+            None if rtype == 'shared_memory' else register(name, rtype))
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+class _Ring:
+    """Slot layout shared by writer and reader"""
+
+    def _map(self, shm, slots, shape, dtype):
+        self.shm = shm
+        self.slots = slots
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.frame_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        self.slot_size = ALIGN + _align(self.frame_bytes)
+        self._slot_offsets = [ALIGN * 2 + i * self.slot_size for i in range(slots)]
+        self._views = [
+            np.ndarray(self.shape, dtype=self.dtype, buffer=shm.buf, offset=offset + ALIGN)
+            for offset in self._slot_offsets
+        ]
+
+    @staticmethod
+    def size_for(slots, shape, dtype):
+        frame_bytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        return ALIGN * 2 + slots * (ALIGN + _align(frame_bytes))
+
+    def _slot_header(self, slot):
+        return SLOT.unpack_from(self.shm.buf, self._slot_offsets[slot])
+
+    def latest_seq(self):
+        return LATEST.unpack_from(self.shm.buf, LATEST_OFFSET)[0]
+
+    def close(self):
+        # Views must be dropped before the mapping can be closed
+        self._views = []
+        try:
+            self.shm.close()
+        except BufferError:
+            # A caller still holds a frame; the mapping goes when that is freed
+            pass
+
+
+class FrameRingWriter(_Ring):
+    """Single producer of frames into a named shared-memory ring
+
+    Each slot is guarded by its sequence number: it is zeroed before the
+    frame is copied in and set to the new sequence afterwards, so readers
+    can tell a complete frame from one being overwritten.
+    """
+
+    def __init__(self, name, shape, dtype=np.uint8, slots=4):
+        if len(shape) > 4:
+            raise ValueError("Frames may have at most 4 dimensions")
+        size = self.size_for(slots, shape, dtype)
+        with _tracker_lock:
+            try:
+                shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            except FileExistsError:
+                # Left behind by a previous run that did not exit cleanly
+                stale = shared_memory.SharedMemory(name=name)
+                stale.close()
+                stale.unlink()
+                shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.name = name
+        self.seq = 0
+        self._map(shm, slots, shape, dtype)
+        dims = list(self.shape) + [0] * (4 - len(self.shape))
+        HEADER.pack_into(shm.buf, 0, MAGIC, VERSION, slots, len(self.shape), *dims,
+                         self.dtype.str.encode(), self.frame_bytes)
+        LATEST.pack_into(shm.buf, LATEST_OFFSET, 0)
+        for offset in self._slot_offsets:
+            SLOT.pack_into(shm.buf, offset, 0, 0.0, 0)
+
+    def publish(self, frame, timestamp=None):
+        """Copy a frame into the next slot; returns its sequence number"""
+        if frame.shape != self.shape or frame.dtype != self.dtype:
+            raise ValueError(f"Frame {frame.shape}/{frame.dtype} does not match ring "
+                             f"{self.shape}/{self.dtype}")
+        seq = self.seq + 1
+        slot = seq % self.slots
+        offset = self._slot_offsets[slot]
+        SLOT.pack_into(self.shm.buf, offset, 0, 0.0, 0)
+        self._views[slot][...] = frame
+        SLOT.pack_into(self.shm.buf, offset, seq, timestamp or time.time(), self.frame_bytes)
+        LATEST.pack_into(self.shm.buf, LATEST_OFFSET, seq)
+        self.seq = seq
+        return seq
+
+    def unlink(self):
+        self.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class FrameRingReader(_Ring):
+    """Attaches to a frame ring and hands out read-only NumPy views of its slots
+
+    Views are not copies: a frame stays intact only until the writer wraps
+    around to its slot again, so callers check valid(seq) after using one.
+    """
+
+    def __init__(self, name):
+        shm = _attach(name)
+        magic, version, slots, ndim, d0, d1, d2, d3, dtype, _ = HEADER.unpack_from(shm.buf, 0)
+        if magic != MAGIC or version != VERSION:
+            shm.close()
+            raise ValueError(f"{name} is not a frame ring")
+        self.name = name
+        self._map(shm, slots, (d0, d1, d2, d3)[:ndim], dtype.rstrip(b'\0').decode())
+        for view in self._views:
+            view.flags.writeable = False
+
+    @classmethod
+    def open(cls, name):
+        """Attach to a ring, or return None if it has not been published yet"""
+        try:
+            return cls(name)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def latest(self):
+        """Newest complete frame as a Frame, or None before the first publish"""
+        for _ in range(self.slots):
+            seq = self.latest_seq()
+            if seq == 0:
+                return None
+            slot = seq % self.slots
+            slot_seq, timestamp, _ = self._slot_header(slot)
+            if slot_seq == seq:
+                return Frame(seq, timestamp, self._views[slot])
+        return None
+
+    def get(self, seq):
+        """The frame with this sequence if it is still in the ring, else None"""
+        slot_seq, timestamp, _ = self._slot_header(seq % self.slots)
+        if seq == 0 or slot_seq != seq:
+            return None
+        return Frame(seq, timestamp, self._views[seq % self.slots])
+
+    def wait_next(self, after_seq, timeout=1.0, poll=0.002):
+        """Block until a frame newer than after_seq is published"""
+        deadline = time.monotonic() + timeout
+        while True:
+            if self.latest_seq() > after_seq:
+                frame = self.latest()
+                if frame is not None:
+                    return frame
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(poll)
+
+    def valid(self, seq):
+        """True if the frame with this sequence has not been overwritten"""
+        return self._slot_header(seq % self.slots)[0] == seq
+
+
+class FrameSubscriber:
+    """Follows one camera's raw frames from another process on the same host
+
+    Frames are read straight out of the ring api.py publishes, with no JPEG
+    round trip:
+
+        with FrameSubscriber(0) as frames:
+            for frame in frames:
+                process(frame.data)
+
+    frame.data is a read-only view into shared memory. It stays intact only
+    until the writer laps its slot (video.ring_slots frames later); check
+    valid(frame) after using it, or pass copy=True to get private arrays.
+    The subscriber re-attaches by itself when api.py restarts.
+    """
+
+    def __init__(self, camera_id, timeout=2.0, copy=False):
+        self.name = ring_name(camera_id)
+        self.timeout = timeout
+        self.copy = copy
+        self.reader = None
+        self.seq = 0
+        # Frames published but never returned because this subscriber fell behind
+        self.skipped = 0
+
+    def _attach(self):
+        if self.reader is not None:
+            self.reader.close()
+        self.reader = FrameRingReader.open(self.name)
+        self.seq = 0
+        return self.reader is not None
+
+    def next(self, timeout=None):
+        """The next frame newer than the last one returned, or None on timeout"""
+        timeout = self.timeout if timeout is None else timeout
+        if self.reader is None and not self._attach():
+            time.sleep(min(timeout, 0.1))
+            return None
+        if self.reader.latest_seq() < self.seq:
+            # The ring was recreated by a restarted writer
+            self.seq = 0
+        frame = self.reader.wait_next(self.seq, timeout)
+        if frame is None:
+            # No frames: the writer may be gone or publishing to a new segment
+            self._attach()
+            return None
+        if self.seq:
+            self.skipped += frame.seq - self.seq - 1
+        self.seq = frame.seq
+        if self.copy:
+            data = frame.data.copy()
+            if not self.reader.valid(frame.seq):
+                return self.next(timeout)
+            frame = frame._replace(data=data)
+        return frame
+
+    def valid(self, frame):
+        """True if frame.data has not been overwritten since it was returned"""
+        return self.reader is not None and self.reader.valid(frame.seq)
+
+    def __iter__(self):
+        while True:
+            frame = self.next()
+            if frame is not None:
+                yield frame
+
+    def close(self):
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,314 @@
+import asyncio
+import json
+import time
+from aiohttp import web, ClientSession, ClientTimeout, TCPConnector, ClientError
+from video_relay import mjpeg_part
+from profiling import span
+
+
+class UpstreamGateway:
+    """Multiplexes browser requests onto a few keep-alive connections to the robot API
+
+    Every request waits on a semaphore before it may use one of the shared
+    upstream connections. Endpoints matching a prefix in endpoint_limits get
+    their own; all others share one of endpoint_concurrency, so a slow
+    endpoint can only tie up its own share of the pool. Waiting costs a
+    coroutine, not a thread.
+    """
+
+    def __init__(self, api_base, gateway_config, upstream_config, get_timeout):
+        self.api_base = api_base
+        self.connections = gateway_config.get('connections', 8)
+        self.endpoint_concurrency = gateway_config.get('endpoint_concurrency', 4)
+        self.endpoint_limits = gateway_config.get('endpoint_limits', {})
+        self.get_retries = upstream_config.get('retries', 2)
+        self.get_timeout = get_timeout
+        self.session = None
+        self._semaphores = {}
+        self._active = {}
+        self.stats = {'requests': 0, 'errors': 0, 'in_flight': 0, 'waiting': 0,
+                      'peak_in_flight': 0}
+
+    async def start(self, app):
+        connector = TCPConnector(limit=self.connections, keepalive_timeout=30)
+        self.session = ClientSession(connector=connector)
+
+    async def close(self, app):
+        if self.session is not None:
+            await self.session.close()
+
+    def _limit_key(self, endpoint):
+        """Longest endpoint_limits prefix matching endpoint, else 'default'"""
+        matches = [prefix for prefix in self.endpoint_limits if endpoint.startswith(prefix)]
+        return max(matches, key=len) if matches else 'default'
+
+    def _limit(self, key):
+        return self.endpoint_limits.get(key, self.endpoint_concurrency)
+
+    def _semaphore(self, key):
+        semaphore = self._semaphores.get(key)
+        if semaphore is None:
+            semaphore = self._semaphores[key] = asyncio.Semaphore(self._limit(key))
+        return semaphore
+
+    async def _send(self, url, method, data, timeout):
+        if method == 'GET':
+            async with self.session.get(url, timeout=timeout) as response:
+                return response.status, await response.text()
+        # Always send a JSON body for POSTs, matching make_api_request
+        async with self.session.post(url, json=data or {}, timeout=timeout) as response:
+            return response.status, await response.text()
+
+    async def request(self, endpoint, method='GET', data=None):
+        """Make a request to the robot API, returning the proxy JSON envelope"""
+        url = f"{self.api_base}{endpoint}"
+        seconds = self.get_timeout(endpoint)
+        timeout = ClientTimeout(total=seconds)
+        key = self._limit_key(endpoint)
+        semaphore = self._semaphore(key)
+        stats = self.stats
+        stats['requests'] += 1
+
+        stats['waiting'] += 1
+        try:
+            with span('lock_wait'):
+                await asyncio.wait_for(semaphore.acquire(), seconds)
+        except asyncio.TimeoutError:
+            stats['errors'] += 1
+            return {'success': False, 'error': f'Gateway busy: {endpoint} concurrency limit reached'}
+        finally:
+            stats['waiting'] -= 1
+
+        stats['in_flight'] += 1
+        self._active[key] = self._active.get(key, 0) + 1
+        stats['peak_in_flight'] = max(stats['peak_in_flight'], stats['in_flight'])
+        try:
+            # Only idempotent GETs are retried
+            attempts = 1 + (self.get_retries if method == 'GET' else 0)
+            for attempt in range(attempts):
+                try:
+                    with span('upstream'):
+                        status, text = await self._send(url, method, data, timeout)
+                    break
+                except (ClientError, asyncio.TimeoutError) as e:
+                    if attempt == attempts - 1:
+                        stats['errors'] += 1
+                        return {'success': False, 'error': str(e) or type(e).__name__}
+
+            if status == 200:
+                return {'success': True, 'data': json.loads(text)}
+            return {'success': False, 'error': f'HTTP {status}: {text}'}
+        finally:
+            stats['in_flight'] -= 1
+            self._active[key] -= 1
+            semaphore.release()
+
+    def get_stats(self):
+        stats = dict(self.stats)
+        stats['connections'] = self.connections
+        stats['endpoints'] = {
+            key: {'limit': self._limit(key), 'active': self._active.get(key, 0)}
+            for key in self._semaphores
+        }
+        return stats
+
+
+def profiling_middleware(profiling):
+    """Request tracing for the gateway, as profiling.install_flask does for Flask"""
+    @web.middleware
+    async def trace_requests(request, handler):
+        if (request.path.startswith('/debug/')
+                and not profiling.authorized(request.headers, request.remote)):
+            return web.json_response({'error': 'Admin token required'}, status=403)
+        handle = profiling.tracer.begin()
+        response = None
+        status = 500
+        try:
+            response = await handler(request)
+            status = response.status
+            return response
+        except web.HTTPException as e:
+            status = e.status
+            raise
+        finally:
+            resource = request.match_info.route.resource
+            route = resource.canonical if resource is not None else 'unmatched'
+            timings = profiling.tracer.finish(handle, request.method, request.path, route, status)
+            # Streamed responses have already sent their headers
+            if response is not None and not response.prepared:
+                response.headers['Server-Timing'] = profiling.tracer.server_timing(timings)
+    return trace_requests
+
+
+def add_profiling_routes(app, profiling):
+    """The /debug endpoints of profiling.install_flask, for the gateway"""
+    async def slow_requests(request):
+        return web.json_response(profiling.tracer.report())
+
+    async def profile_start(request):
+        data = await request.json() if request.can_read_body else {}
+        status, body = profiling.start_profile(
+            data.get('seconds', request.query.get('seconds', 10)),
+            data.get('interval_ms', request.query.get('interval_ms', 5)))
+        return web.json_response(body, status=status)
+
+    async def profile_stop(request):
+        # Joining the sampler thread blocks briefly; keep it off the event loop
+        status, body = await asyncio.get_running_loop().run_in_executor(
+            None, profiling.stop_profile)
+        return web.json_response(body, status=status)
+
+    async def profile_result(request):
+        if request.query.get('status'):
+            return web.json_response(profiling.sampler.status())
+        return web.Response(text=profiling.sampler.folded(), content_type='text/plain',
+                            headers={'Content-Disposition': 'attachment; filename="profile.folded"'})
+
+    app.router.add_get('/debug/slow', slow_requests)
+    app.router.add_post('/debug/profile/start', profile_start)
+    app.router.add_post('/debug/profile/stop', profile_stop)
+    app.router.add_get('/debug/profile', profile_result)
+
+
+def create_gateway_app(config, dashboard, get_timeout, video_relay, response_cache,
+                       profiling=None):
+    """Build the aiohttp application serving the dashboard and /api/<path>"""
+    client_config = config['client']
+    gateway = UpstreamGateway(config['api']['base_url'],
+                              client_config.get('gateway', {}),
+                              client_config.get('upstream', {}),
+                              get_timeout)
+
+    def send_asset(request, asset):
+        status, headers, body = asset.respond(request.headers.get('If-None-Match'),
+                                              request.headers.get('Accept-Encoding'))
+        return web.Response(body=body, status=status, headers=headers)
+
+    async def index(request):
+        return send_asset(request, dashboard.page)
+
+    async def dashboard_asset(request):
+        asset = dashboard.assets.get(request.match_info['name'])
+        if asset is None:
+            return web.json_response({'success': False, 'error': 'Not found'}, status=404)
+        return send_asset(request, asset)
+
+    async def api_batch(request):
+        # Validated here as client.py does, so a bad batch never reaches the robot
+        try:
+            data = await request.json()
+        except ValueError:
+            data = None
+        if not isinstance(data, dict) or not isinstance(data.get('operations'), list):
+            return web.json_response({'success': False, 'error': 'operations must be a list'})
+        response_cache.invalidate()
+        try:
+            result = await gateway.request('/batch', 'POST', data)
+        finally:
+            response_cache.invalidate()
+        return web.json_response(result)
+
+    async def api_proxy(request):
+        endpoint = request.match_info['endpoint']
+        try:
+            data = None
+            if request.method == 'POST':
+                # Try to get JSON data, but don't fail if there isn't any
+                try:
+                    data = await request.json()
+                except ValueError:
+                    data = None
+            endpoint = f'/{endpoint}'
+            if request.method == 'GET':
+                result = await response_cache.get_or_load_async(
+                    endpoint, lambda: gateway.request(endpoint))
+            else:
+                # Invalidate before and after so no GET that overlaps the command is cached
+                response_cache.invalidate()
+                try:
+                    result = await gateway.request(endpoint, request.method, data)
+                finally:
+                    response_cache.invalidate()
+            return web.json_response(result)
+        except Exception as e:
+            return web.json_response({'success': False, 'error': f'Proxy error: {str(e)}'})
+
+    async def proxy_stats(request):
+        stats = gateway.get_stats()
+        stats['cache'] = response_cache.get_stats()
+        return web.json_response(stats)
+
+    async def video_stream(request):
+        # The relay's reader runs on its own thread; viewers just poll its latest frame
+        camera_id = request.match_info['camera_id']
+        relay = video_relay.camera(camera_id)
+        if relay is None:
+            return web.json_response({'success': False, 'error': f'Unknown camera {camera_id}'},
+                                     status=404)
+        interval = max(video_relay.min_interval, 0.01)
+        response = web.StreamResponse(
+            headers={'Content-Type': 'multipart/x-mixed-replace; boundary=frame'})
+        await response.prepare(request)
+        seq = 0
+        last_frame_at = time.monotonic()
+        try:
+            while time.monotonic() - last_frame_at < 10.0:
+                new_seq, frame = relay.latest()
+                if frame is not None and new_seq != seq:
+                    seq = new_seq
+                    last_frame_at = time.monotonic()
+                    await response.write(mjpeg_part(frame))
+                await asyncio.sleep(interval)
+        except ConnectionResetError:
+            pass
+        return response
+
+    async def video_frame(request):
+        camera_id = request.match_info['camera_id']
+        relay = video_relay.camera(camera_id)
+        if relay is None:
+            return web.json_response({'success': False, 'error': f'Unknown camera {camera_id}'},
+                                     status=404)
+        wait = video_relay.allow(request.remote, camera_id)
+        if wait:
+            return web.json_response({'success': False, 'error': 'Frame rate limit exceeded'},
+                                     status=429, headers={'Retry-After': str(max(1, round(wait)))})
+        seq, frame = relay.latest()
+        deadline = time.monotonic() + 3.0
+        while frame is None and time.monotonic() < deadline:
+            # First viewer after an idle period: give the upstream a moment to connect
+            await asyncio.sleep(0.05)
+            seq, frame = relay.latest()
+        if frame is None:
+            return web.json_response({'success': False, 'error': relay.error or 'Camera not available'},
+                                     status=503)
+        return web.Response(body=frame, content_type='image/jpeg',
+                            headers={'Cache-Control': 'no-store', 'X-Frame-Seq': str(seq)})
+
+    async def relay_stats(request):
+        return web.json_response(video_relay.get_stats())
+
+    tracing = profiling is not None and profiling.enabled
+    app = web.Application(middlewares=[profiling_middleware(profiling)] if tracing else [])
+    app['gateway'] = gateway
+    if tracing:
+        add_profiling_routes(app, profiling)
+    app.router.add_get('/', index)
+    app.router.add_get('/assets/{name}', dashboard_asset)
+    app.router.add_post('/api/batch', api_batch)
+    app.router.add_route('GET', '/api/{endpoint:.+}', api_proxy)
+    app.router.add_route('POST', '/api/{endpoint:.+}', api_proxy)
+    app.router.add_get('/proxy/stats', proxy_stats)
+    app.router.add_get('/video/stream/{camera_id}', video_stream)
+    app.router.add_get('/video/frame/{camera_id}', video_frame)
+    app.router.add_get('/video/relay/stats', relay_stats)
+    app.on_startup.append(gateway.start)
+    app.on_cleanup.append(gateway.close)
+    return app
+
+
+def run_gateway(config, dashboard, get_timeout, video_relay, response_cache, profiling=None):
+    """Serve the control interface with the asyncio gateway"""
+    app = create_gateway_app(config, dashboard, get_timeout, video_relay, response_cache,
+                             profiling)
+    web.run_app(app, host=config['client']['host'], port=config['client']['port'])
@@ -0,0 +1,388 @@
+import argparse
+import json
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+import zlib
+from collections import namedtuple
+
+MAGIC = b'ADUMJRN1'
+# Written once per file: wall clock and perf_counter at open, pid. Record
+# timestamps are perf_counter values, so this pair maps them to wall time.
+FILE_HEADER = struct.Struct('<8sddI')
+# body length, body crc32, started (perf_counter), latency seconds, outcome
+RECORD = struct.Struct('<IIddB')
+OK, ERROR = 0, 1
+
+# Connection management recorded in the journal but never replayed
+LIFECYCLE_METHODS = ('close', 'disconnect', 'connect', 'open')
+
+JournalRecord = namedtuple(
+    'JournalRecord', 'wall_time started latency ok method args kwargs result source')
+
+# Compact tagged encoding for call arguments and results
+
+_NONE, _TRUE, _FALSE, _INT, _FLOAT, _STR, _LIST, _DICT, _BYTES = b'NTFifslDb'
+_I64 = struct.Struct('<q')
+_F64 = struct.Struct('<d')
+_U32 = struct.Struct('<I')
+
+
+def _pack(value, out):
+    if value is None:
+        out.append(_NONE)
+    elif value is True:
+        out.append(_TRUE)
+    elif value is False:
+        out.append(_FALSE)
+    elif isinstance(value, int) and -2**63 <= value < 2**63:
+        out.append(_INT)
+        out += _I64.pack(value)
+    elif isinstance(value, float):
+        out.append(_FLOAT)
+        out += _F64.pack(value)
+    elif isinstance(value, (list, tuple)):
+        out.append(_LIST)
+        out += _U32.pack(len(value))
+        for item in value:
+            _pack(item, out)
+    elif isinstance(value, dict):
+        out.append(_DICT)
+        out += _U32.pack(len(value))
+        for key, item in value.items():
+            _pack(str(key), out)
+            _pack(item, out)
+    elif isinstance(value, (bytes, bytearray)):
+        out.append(_BYTES)
+        out += _U32.pack(len(value)) + value
+    elif hasattr(value, 'tolist'):
+        # NumPy scalars and arrays
+        _pack(value.tolist(), out)
+    else:
+        data = str(value).encode('utf-8')
+        out.append(_STR)
+        out += _U32.pack(len(data)) + data
+
+
+def _unpack(buf, offset):
+    tag = buf[offset]
+    offset += 1
+    if tag == _NONE:
+        return None, offset
+    if tag == _TRUE:
+        return True, offset
+    if tag == _FALSE:
+        return False, offset
+    if tag == _INT:
+        return _I64.unpack_from(buf, offset)[0], offset + 8
+    if tag == _FLOAT:
+        return _F64.unpack_from(buf, offset)[0], offset + 8
+    if tag in (_STR, _BYTES):
+        size = _U32.unpack_from(buf, offset)[0]
+        data = bytes(buf[offset + 4:offset + 4 + size])
+        return (data.decode('utf-8') if tag == _STR else data), offset + 4 + size
+    if tag == _LIST:
+        count = _U32.unpack_from(buf, offset)[0]
+        offset += 4
+        items = []
+        for _ in range(count):
+            item, offset = _unpack(buf, offset)
+            items.append(item)
+        return items, offset
+    if tag == _DICT:
+        count = _U32.unpack_from(buf, offset)[0]
+        offset += 4
+        items = {}
+        for _ in range(count):
+            key, offset = _unpack(buf, offset)
+            items[key], offset = _unpack(buf, offset)
+        return items, offset
+    raise ValueError(f"Bad journal value tag {tag!r}")
+
+
+def encode_record(method, args, kwargs, result, error, started, latency, source):
+    """One journal record as bytes"""
+    body = bytearray()
+    for value in (method, source, list(args), kwargs,
+                  result if error is None else f"{type(error).__name__}: {error}"):
+        _pack(value, body)
+    return RECORD.pack(len(body), zlib.crc32(body), started, latency,
+                       OK if error is None else ERROR) + body
+
+
+class CommandJournal:
+    """Append-only binary journal of arm calls, written by a background thread
+
+    record() has the InstrumentedArm listener signature. It encodes the
+    call and queues it without touching the disk; when the queue is full
+    the record is dropped and counted rather than blocking the arm call.
+    Files rotate at max_bytes as path, path.1 ... path.<backups>.
+    """
+
+    def __init__(self, path, max_bytes=16 * 1024 * 1024, backups=5, queue_size=10000,
+                 flush_interval=1.0, record_queries=True, source=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_interval = flush_interval
+        self.record_queries = record_queries
+        # Called on the arm-calling thread to label each record
+        self.source = source or (lambda: threading.current_thread().name)
+        self._queue = queue.Queue(queue_size)
+        self._file = None
+        self._size = 0
+        self.stats = {'records': 0, 'dropped': 0, 'bytes': 0, 'rotations': 0, 'errors': 0}
+        self._thread = threading.Thread(target=self._run, name='command-journal')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def record(self, method, args, kwargs, result, error, started, latency):
+        if not self.record_queries and method.startswith(('get_', 'is_')):
+            return
+        try:
+            data = encode_record(method, args, kwargs, result, error, started, latency,
+                                 self.source())
+            self._queue.put_nowait(data)
+        except queue.Full:
+            self.stats['dropped'] += 1
+        except Exception as e:
+            # The journal must never break the arm call it observes
+            self.stats['errors'] += 1
+            print(f"Error journaling {method}: {e}")
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, 'ab', buffering=256 * 1024)
+        self._size = self._file.tell()
+        if self._size == 0:
+            self._write(FILE_HEADER.pack(MAGIC, time.time(), time.perf_counter(), os.getpid()))
+        else:
+            # Appending after a restart: perf_counter restarted too, so re-anchor
+            self._rotate()
+
+    def _rotate(self):
+        self._file.close()
+        for index in range(self.backups - 1, 0, -1):
+            if os.path.exists(f'{self.path}.{index}'):
+                os.replace(f'{self.path}.{index}', f'{self.path}.{index + 1}')
+        if self.backups > 0:
+            os.replace(self.path, f'{self.path}.1')
+        else:
+            os.remove(self.path)
+        self.stats['rotations'] += 1
+        self._file = open(self.path, 'wb', buffering=256 * 1024)
+        self._size = 0
+        self._write(FILE_HEADER.pack(MAGIC, time.time(), time.perf_counter(), os.getpid()))
+
+    def _write(self, data):
+        self._file.write(data)
+        self._size += len(data)
+        self.stats['bytes'] += len(data)
+
+    def _run(self):
+        try:
+            self._open()
+        except Exception as e:
+            print(f"Error opening command journal {self.path}: {e}")
+            return
+        while True:
+            try:
+                data = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                data = b''
+            if data is None:
+                break
+            # Any failure is counted and the loop goes on: a dead writer would
+            # leave record() dropping everything and close() with no one to stop
+            try:
+                if self._file.closed:
+                    # A rotation failed part way; start a fresh file if possible
+                    self._open()
+                if not data:
+                    self._file.flush()
+                    continue
+                if self._size + len(data) > self.max_bytes and self._size > FILE_HEADER.size:
+                    self._rotate()
+                self._write(data)
+                self.stats['records'] += 1
+            except Exception as e:
+                self.stats['errors'] += 1
+                print(f"Error writing command journal: {e}")
+        self._file.close()
+
+    def close(self, timeout=10):
+        """Write out everything queued and close the file"""
+        deadline = time.monotonic() + timeout
+        # Polled so a writer that dies meanwhile (e.g. it could not open the
+        # file) does not leave this waiting on a full queue nobody drains
+        while self._thread.is_alive():
+            try:
+                self._queue.put(None, timeout=0.1)
+            except queue.Full:
+                if time.monotonic() >= deadline:
+                    print(f"Command journal {self.path} did not drain; closing without it")
+                    return
+                continue
+            self._thread.join(max(deadline - time.monotonic(), 0))
+            return
+
+    def get_stats(self):
+        return dict(self.stats, queued=self._queue.qsize(), path=self.path)
+
+
+def journal_files(path):
+    """The journal and its rotated backups, oldest first"""
+    backups = []
+    directory, name = os.path.split(os.path.abspath(path))
+    for entry in os.listdir(directory):
+        suffix = entry[len(name) + 1:]
+        if entry.startswith(name + '.') and suffix.isdigit():
+            backups.append((int(suffix), os.path.join(directory, entry)))
+    files = [file for _, file in sorted(backups, reverse=True)]
+    if os.path.exists(path):
+        files.append(path)
+    return files
+
+
+def read_journal(path):
+    """Yield the JournalRecords of one journal file, stopping at a torn tail"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < FILE_HEADER.size:
+        return
+    magic, wall_anchor, perf_anchor, _ = FILE_HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a command journal")
+    offset = FILE_HEADER.size
+    while offset + RECORD.size <= len(data):
+        length, crc, started, latency, outcome = RECORD.unpack_from(data, offset)
+        body = data[offset + RECORD.size:offset + RECORD.size + length]
+        if len(body) < length or zlib.crc32(body) != crc:
+            # Written up to a crash; everything after it is unreliable
+            return
+        offset += RECORD.size + length
+        values = []
+        position = 0
+        for _ in range(5):
+            value, position = _unpack(body, position)
+            values.append(value)
+        method, source, args, kwargs, result = values
+        yield JournalRecord(wall_anchor + started - perf_anchor, started, latency,
+                            outcome == OK, method, args, kwargs, result, source)
+
+
+def read_journals(path):
+    """All records of a journal and its backups, in wall-clock order"""
+    records = []
+    for file in journal_files(path):
+        records.extend(read_journal(file))
+    records.sort(key=lambda record: record.wall_time)
+    return records
+
+
+def replay(records, arm, speed=1.0, skip_queries=False, progress=None):
+    """Re-issue journal records against an arm, preserving their spacing
+
+    speed scales time between commands (2.0 replays twice as fast, 0 as
+    fast as possible). Returns per-record results for comparison.
+    """
+    results = []
+    began = time.monotonic()
+    first = None
+    for record in records:
+        if record.method in LIFECYCLE_METHODS:
+            continue
+        if skip_queries and record.method.startswith(('get_', 'is_')):
+            continue
+        if first is None:
+            first = record.wall_time
+        if speed > 0:
+            delay = (record.wall_time - first) / speed - (time.monotonic() - began)
+            if delay > 0:
+                time.sleep(delay)
+        lag = time.monotonic() - began - ((record.wall_time - first) / speed if speed > 0 else 0)
+        started = time.perf_counter()
+        try:
+            getattr(arm, record.method)(*record.args, **record.kwargs)
+            ok, error = True, None
+        except Exception as e:
+            ok, error = False, f"{type(e).__name__}: {e}"
+        latency = time.perf_counter() - started
+        results.append({"method": record.method, "ok": ok, "error": error,
+                        "original_ok": record.ok, "latency": latency,
+                        "original_latency": record.latency, "lag": max(lag, 0.0)})
+        if progress is not None:
+            progress(len(results))
+    return results
+
+
+def summarize(results):
+    """Latency and outcome comparison of a replay against the original run"""
+    import numpy as np
+    summary = {"commands": len(results),
+               "errors": sum(not result["ok"] for result in results),
+               "outcome_mismatches": sum(result["ok"] != result["original_ok"]
+                                         for result in results),
+               "methods": {}}
+    if results:
+        summary["max_lag_ms"] = round(max(result["lag"] for result in results) * 1000, 3)
+    by_method = {}
+    for result in results:
+        by_method.setdefault(result["method"], []).append(result)
+    for method, items in sorted(by_method.items()):
+        replayed = np.array([item["latency"] for item in items]) * 1000
+        original = np.array([item["original_latency"] for item in items]) * 1000
+        summary["methods"][method] = {
+            "count": len(items),
+            "p50_ms": round(float(np.percentile(replayed, 50)), 3),
+            "p99_ms": round(float(np.percentile(replayed, 99)), 3),
+            "original_p50_ms": round(float(np.percentile(original, 50)), 3),
+            "original_p99_ms": round(float(np.percentile(original, 99)), 3),
+        }
+    return summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Inspect or replay an arm command journal")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    dump = subparsers.add_parser('dump', help="Print records as JSON lines")
+    dump.add_argument('path', help="Journal file; rotated backups are included")
+    play = subparsers.add_parser('replay', help="Re-issue the journal against an arm")
+    play.add_argument('path', help="Journal file; rotated backups are included")
+    play.add_argument('--config', default='config.yaml', help="Path to config.yaml")
+    play.add_argument('--backend', choices=['hardware', 'simulated'], default='simulated',
+                      help="Arm to replay against (default: simulated)")
+    play.add_argument('--speed', type=float, default=1.0,
+                      help="Timing scale: 1 original, 10 ten times faster, 0 no waits")
+    play.add_argument('--skip-queries', action='store_true',
+                      help="Only replay commands, not get_*/is_* queries")
+    play.add_argument('--output', help="Write the per-method comparison as JSON")
+    args = parser.parse_args()
+
+    records = read_journals(args.path)
+    if args.command == 'dump':
+        for record in records:
+            print(json.dumps(record._asdict(), default=repr))
+        sys.exit(0)
+
+    import yaml
+    from robot_api import create_arm
+    with open(args.config) as f:
+        robot_config = dict(yaml.safe_load(f).get('robot', {}), backend=args.backend)
+    arm = create_arm(robot_config)
+    if args.backend == 'hardware':
+        time.sleep(0.5)
+    span = records[-1].wall_time - records[0].wall_time if records else 0
+    print(f"Replaying {len(records)} records spanning {span:.1f}s at speed {args.speed:g} "
+          f"against the {args.backend} arm")
+    summary = summarize(replay(records, arm, args.speed, args.skip_queries))
+    print(json.dumps(summary, indent=2, sort_keys=True))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(summary, f, indent=2, sort_keys=True)
+            f.write('\n')
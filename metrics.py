@@ -0,0 +1,239 @@
+import bisect
+import os
+import resource
+import threading
+import time
+from contextlib import contextmanager
+from profiling import add_span
+
+# Latency buckets in seconds, spanning sub-millisecond serial replies to slow encodes
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    parts = []
+    for key, value in labels:
+        value = value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{key}="{value}"')
+    return '{' + ','.join(parts) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonically increasing count"""
+
+    kind = 'counter'
+    # Counter samples, and so their family in # HELP/# TYPE, end in _total
+    suffix = '_total'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def samples(self, name, labels):
+        return [(name + self.suffix, labels, self.value)]
+
+
+class Gauge:
+    """Value that can go up and down"""
+
+    kind = 'gauge'
+    suffix = ''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0
+
+    def set(self, value):
+        self.value = value
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        with self._lock:
+            self.value -= amount
+
+    def samples(self, name, labels):
+        return [(name, labels, self.value)]
+
+
+class Histogram:
+    """Cumulative histogram with fixed buckets"""
+
+    kind = 'histogram'
+    suffix = ''
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self._lock = threading.Lock()
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def samples(self, name, labels):
+        with self._lock:
+            counts = list(self.counts)
+            total, count = self.sum, self.count
+        result = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += bucket_count
+            result.append((name + '_bucket', labels + (('le', _format_value(float(bound))),), cumulative))
+        result.append((name + '_sum', labels, total))
+        result.append((name + '_count', labels, count))
+        return result
+
+
+class MetricsRegistry:
+    """Holds named metrics and renders them in the Prometheus text format"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._families = {}
+
+    def _get(self, cls, name, help_text, labels, **kwargs):
+        key = tuple(sorted((k, str(v)) for k, v in (labels or {}).items()))
+        family = self._families.get(name)
+        if family is None or key not in family['metrics']:
+            with self._lock:
+                family = self._families.setdefault(
+                    name, {'kind': cls.kind, 'suffix': cls.suffix, 'help': help_text,
+                           'metrics': {}})
+                if key not in family['metrics']:
+                    family['metrics'][key] = cls(**kwargs)
+        return family['metrics'][key]
+
+    def counter(self, name, help_text='', labels=None):
+        return self._get(Counter, name, help_text, labels)
+
+    def gauge(self, name, help_text='', labels=None):
+        return self._get(Gauge, name, help_text, labels)
+
+    def histogram(self, name, help_text='', labels=None, buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, help_text, labels, buckets=buckets)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            families = sorted((name, dict(family), dict(family['metrics']))
+                              for name, family in self._families.items())
+        for name, family, metrics in families:
+            family_name = name + family['suffix']
+            if family['help']:
+                lines.append(f"# HELP {family_name} {family['help']}")
+            lines.append(f"# TYPE {family_name} {family['kind']}")
+            for labels, metric in sorted(metrics.items()):
+                for sample_name, sample_labels, value in metric.samples(name, labels):
+                    lines.append(f"{sample_name}{_format_labels(sample_labels)} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+def process_rss_bytes():
+    """Current resident set size of this process"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        # Peak rather than current RSS, in kilobytes on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+@contextmanager
+def timed_lock(lock, wait_histogram, waiters_gauge=None):
+    """Acquire lock, recording how long the caller queued for it"""
+    if waiters_gauge is not None:
+        waiters_gauge.inc()
+    start = time.perf_counter()
+    lock.acquire()
+    waited = time.perf_counter() - start
+    wait_histogram.observe(waited)
+    add_span('lock_wait', waited)
+    if waiters_gauge is not None:
+        waiters_gauge.dec()
+    try:
+        yield
+    finally:
+        lock.release()
+
+
+class InstrumentedArm:
+    """Proxy around an arm object that times every method call
+
+    Listeners are called after each call as
+    listener(method, args, kwargs, result, error, started, latency).
+    """
+
+    def __init__(self, arm, registry, listeners=()):
+        self._arm = arm
+        self._registry = registry
+        self._listeners = list(listeners)
+        self._in_flight = registry.gauge(
+            'arm_commands_in_flight', 'Arm commands issued and not yet returned')
+        self._wrappers = {}
+
+    def __getattr__(self, name):
+        wrapper = self._wrappers.get(name)
+        if wrapper is not None:
+            return wrapper
+        attr = getattr(self._arm, name)
+        if not callable(attr):
+            return attr
+
+        latency = self._registry.histogram(
+            'arm_command_duration_seconds', 'Latency of arm method calls',
+            {'method': name})
+        errors = self._registry.counter(
+            'arm_command_errors', 'Arm method calls that raised', {'method': name})
+        in_flight = self._in_flight
+        listeners = self._listeners
+
+        def wrapper(*args, **kwargs):
+            in_flight.inc()
+            start = time.perf_counter()
+            result = error = None
+            try:
+                result = attr(*args, **kwargs)
+                return result
+            except Exception as e:
+                error = e
+                errors.inc()
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                latency.observe(elapsed)
+                add_span('serial', elapsed)
+                in_flight.dec()
+                for listener in listeners:
+                    listener(name, args, kwargs, result, error, start, elapsed)
+
+        self._wrappers[name] = wrapper
+        return wrapper
@@ -0,0 +1,268 @@
+import contextvars
+import ipaddress
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+# Time categories a request is broken down into
+SPAN_KINDS = ('lock_wait', 'device_read', 'encode', 'serial', 'upstream')
+
+# Shortest sampling interval; each sample walks every thread's stack under the GIL
+MIN_SAMPLE_INTERVAL = 0.001
+
+# Trace of the request being handled; per thread under Flask, per task under asyncio
+_current = contextvars.ContextVar('request_trace', default=None)
+
+
+def add_span(kind, seconds):
+    """Charge time to a span of the current request, if it is being traced"""
+    spans = _current.get()
+    if spans is not None:
+        spans[kind] = spans.get(kind, 0.0) + seconds
+
+
+class span:
+    """Context manager timing a block into a span of the current request"""
+
+    __slots__ = ('kind', 'start')
+
+    def __init__(self, kind):
+        self.kind = kind
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        add_span(self.kind, time.perf_counter() - self.start)
+
+
+class RequestTracer:
+    """Per-request span totals, keeping requests slower than a threshold
+
+    Slow requests go into a bounded buffer, newest last, so the log
+    always holds the most recent ones without growing.
+    """
+
+    def __init__(self, slow_ms=250, capacity=200):
+        self.slow_seconds = slow_ms / 1000.0
+        self.slow = deque(maxlen=capacity)
+        self.stats = {'traced': 0, 'slow': 0}
+
+    def begin(self):
+        """Start tracing the current request; returns a handle for finish()"""
+        spans = {}
+        return time.perf_counter(), spans, _current.set(spans)
+
+    def finish(self, handle, method, path, route, status):
+        """Stop tracing; returns the span breakdown in milliseconds"""
+        started, spans, token = handle
+        _current.reset(token)
+        total = time.perf_counter() - started
+        timings = {kind: round(seconds * 1000, 3) for kind, seconds in spans.items()}
+        timings['other'] = round(max(total - sum(spans.values()), 0.0) * 1000, 3)
+        timings['total'] = round(total * 1000, 3)
+        self.stats['traced'] += 1
+        if total >= self.slow_seconds:
+            self.stats['slow'] += 1
+            self.slow.append({"time": time.time(), "method": method, "path": path,
+                              "route": route, "status": status, "spans_ms": timings,
+                              "thread": threading.current_thread().name})
+        return timings
+
+    @staticmethod
+    def server_timing(timings):
+        """Server-Timing header value, shown per request in browser dev tools"""
+        return ', '.join(f'{kind};dur={ms}' for kind, ms in timings.items())
+
+    def report(self):
+        return dict(self.stats, threshold_ms=self.slow_seconds * 1000, requests=list(self.slow))
+
+
+class SamplingProfiler:
+    """Statistical profiler that samples every thread's stack from a background thread
+
+    Output is in folded-stack format (one "frame;frame;frame count" line
+    per stack), which flamegraph.pl and speedscope load directly.
+    """
+
+    def __init__(self, max_seconds=300):
+        self.max_seconds = max_seconds
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopped = threading.Event()
+        self._counts = {}
+        self.samples = 0
+        self.started_at = None
+        self.finished_at = None
+        self.interval = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds, interval=0.005):
+        """Begin sampling for up to seconds; discards the previous result"""
+        if not 0 < seconds <= self.max_seconds:
+            raise ValueError(f"Duration must be between 0 and {self.max_seconds} seconds")
+        if not interval >= MIN_SAMPLE_INTERVAL:
+            raise ValueError(f"Interval must be at least {MIN_SAMPLE_INTERVAL * 1000:g} ms")
+        with self._lock:
+            if self.running:
+                raise RuntimeError("A profile is already running")
+            self._counts = {}
+            self.samples = 0
+            self.interval = interval
+            self.started_at = time.time()
+            self.finished_at = None
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, args=(seconds,),
+                                            name='sampling-profiler')
+            self._thread.daemon = True
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(5)
+
+    def _run(self, seconds):
+        own = threading.get_ident()
+        deadline = time.monotonic() + seconds
+        while not self._stopped.is_set() and time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            keys = []
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:'
+                                 f'{frame.f_lineno})')
+                    frame = frame.f_back
+                stack.append(names.get(ident, 'thread'))
+                keys.append(';'.join(reversed(stack)))
+            with self._lock:
+                for key in keys:
+                    self._counts[key] = self._counts.get(key, 0) + 1
+                self.samples += 1
+            self._stopped.wait(self.interval)
+        self.finished_at = time.time()
+
+    def status(self):
+        return {"running": self.running, "samples": self.samples, "stacks": len(self._counts),
+                "interval_ms": self.interval * 1000 if self.interval else None,
+                "started_at": self.started_at, "finished_at": self.finished_at}
+
+    def folded(self):
+        """The sampled stacks in folded format, most frequent first"""
+        with self._lock:
+            counts = sorted(self._counts.items(), key=lambda item: -item[1])
+        return ''.join(f'{stack} {count}\n' for stack, count in counts)
+
+
+class Profiling:
+    """Opt-in request tracing and on-demand sampling for one server process
+
+    Framework-neutral: api.py and client.py install it with
+    install_flask(), the asyncio gateway with its own middleware.
+    """
+
+    def __init__(self, profiling_config):
+        self.enabled = profiling_config.get('enabled', False)
+        self.admin_token = profiling_config.get('admin_token') or None
+        self.tracer = RequestTracer(profiling_config.get('slow_ms', 250),
+                                    profiling_config.get('slow_buffer', 200))
+        self.sampler = SamplingProfiler(profiling_config.get('max_profile_seconds', 300))
+
+    def authorized(self, headers, remote_addr):
+        """Admin token check; without a configured token only loopback callers are allowed"""
+        if self.admin_token is not None:
+            return headers.get('X-Admin-Token') == self.admin_token
+        try:
+            address = ipaddress.ip_address(remote_addr or '')
+        except ValueError:
+            return False
+        # Dual-stack sockets report IPv4 callers as ::ffff:a.b.c.d
+        return (getattr(address, 'ipv4_mapped', None) or address).is_loopback
+
+    def start_profile(self, seconds, interval_ms):
+        """Admin action; returns (status, body)"""
+        try:
+            self.sampler.start(float(seconds), float(interval_ms) / 1000)
+        except (TypeError, ValueError) as e:
+            return 400, {"error": str(e)}
+        except RuntimeError as e:
+            return 409, {"error": str(e)}
+        return 200, dict(self.sampler.status(), duration_seconds=float(seconds))
+
+    def stop_profile(self):
+        self.sampler.stop()
+        return 200, self.sampler.status()
+
+
+def install_flask(app, profiling):
+    """Trace every request of a Flask app and add the /debug endpoints"""
+    from flask import Blueprint, Response, request, jsonify, g
+
+    debug = Blueprint('profiling', __name__)
+
+    @debug.before_app_request
+    def begin_trace():
+        g.profiling_trace = profiling.tracer.begin()
+
+    @debug.after_app_request
+    def finish_trace(response):
+        handle = g.pop('profiling_trace', None)
+        if handle is not None:
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            timings = profiling.tracer.finish(handle, request.method, request.path, route,
+                                              response.status_code)
+            response.headers['Server-Timing'] = profiling.tracer.server_timing(timings)
+        return response
+
+    @debug.before_request
+    def check_token():
+        if not profiling.authorized(request.headers, request.remote_addr):
+            return jsonify({"error": "Admin token required"}), 403
+
+    @debug.route('/debug/slow', methods=['GET'])
+    def slow_requests():
+        """Recent requests slower than the threshold, with their span breakdown"""
+        return jsonify(profiling.tracer.report())
+
+    @debug.route('/debug/profile/start', methods=['POST'])
+    def profile_start():
+        """Sample all threads for N seconds {seconds, interval_ms}"""
+        data = request.get_json(silent=True) or {}
+        status, body = profiling.start_profile(
+            data.get('seconds', request.args.get('seconds', 10)),
+            data.get('interval_ms', request.args.get('interval_ms', 5)))
+        return jsonify(body), status
+
+    @debug.route('/debug/profile/stop', methods=['POST'])
+    def profile_stop():
+        status, body = profiling.stop_profile()
+        return jsonify(body), status
+
+    @debug.route('/debug/profile', methods=['GET'])
+    def profile_result():
+        """Folded stacks of the running or last profile; ?status=1 for progress only"""
+        if request.args.get('status'):
+            return jsonify(profiling.sampler.status())
+        response = Response(profiling.sampler.folded(), mimetype='text/plain')
+        response.headers['Content-Disposition'] = 'attachment; filename="profile.folded"'
+        return response
+
+    app.register_blueprint(debug)
+
+
+PROFILING_DOCS = {
+    "GET /debug/slow": "Recent slow requests with lock_wait/device_read/encode/serial/upstream times",
+    "POST /debug/profile/start": "Start the sampling profiler {seconds, interval_ms}",
+    "POST /debug/profile/stop": "Stop the sampling profiler early",
+    "GET /debug/profile": "Download folded stacks (flamegraph.pl, speedscope); ?status=1 for progress"
+}
@@ -0,0 +1,153 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+_MISS = object()
+
+
+class _Flight:
+    """An upstream call that concurrent identical requests wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        # Raised by the leader's call; re-raised in every waiter
+        self.error = None
+
+
+class ResponseCache:
+    """LRU cache of proxied GET results with per-endpoint TTLs
+
+    Concurrent misses for the same key share one upstream call
+    (single-flight). invalidate() drops every entry and also stops calls
+    already in flight from storing their now possibly stale results.
+    """
+
+    def __init__(self, ttls=None, default_ttl=0, max_entries=256):
+        self.ttls = ttls or {}
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._flights = {}
+        self._async_flights = {}
+        self._generation = 0
+        self.stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'evictions': 0,
+                      'invalidations': 0}
+
+    def ttl_for(self, key):
+        """TTL for an endpoint: longest matching prefix in ttls, else default_ttl"""
+        matches = [prefix for prefix in self.ttls if key.startswith(prefix)]
+        if matches:
+            return self.ttls[max(matches, key=len)]
+        return self.default_ttl
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISS
+        expires, value = entry
+        if expires < time.monotonic():
+            del self._entries[key]
+            return _MISS
+        self._entries.move_to_end(key)
+        self.stats['hits'] += 1
+        return value
+
+    def _store(self, key, value, ttl, generation):
+        # Only successful envelopes are cached; errors are shared but not kept
+        if generation != self._generation or not (isinstance(value, dict) and value.get('success')):
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def get_or_load(self, key, loader):
+        """Return a cached result for key, or call loader() once for all waiters"""
+        ttl = self.ttl_for(key)
+        if ttl <= 0:
+            return loader()
+        with self._lock:
+            value = self._lookup(key)
+            if value is not _MISS:
+                return value
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                generation = self._generation
+                self.stats['misses'] += 1
+            else:
+                self.stats['coalesced'] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = loader()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._store(key, flight.result, ttl, generation)
+                del self._flights[key]
+            flight.done.set()
+
+    async def get_or_load_async(self, key, loader):
+        """Coroutine version of get_or_load for the asyncio gateway"""
+        ttl = self.ttl_for(key)
+        if ttl <= 0:
+            return await loader()
+        with self._lock:
+            value = self._lookup(key)
+            if value is not _MISS:
+                return value
+        future = self._async_flights.get(key)
+        if future is not None:
+            self.stats['coalesced'] += 1
+            return await asyncio.shield(future)
+
+        future = self._async_flights[key] = asyncio.get_running_loop().create_future()
+        generation = self._generation
+        self.stats['misses'] += 1
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            # Only the leader's request was cancelled; fail the waiters normally
+            future.set_exception(ConnectionError(f"Upstream call for {key} was cancelled"))
+            future.exception()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception retrieved when nobody else was waiting
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            with self._lock:
+                self._store(key, value, ttl, generation)
+            return value
+        finally:
+            del self._async_flights[key]
+
+    def invalidate(self):
+        """Drop all cached results, e.g. after a command that changes robot state"""
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self.stats['invalidations'] += 1
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['entries'] = len(self._entries)
+            stats['in_flight'] = len(self._flights) + len(self._async_flights)
+        return stats
@@ -0,0 +1,344 @@
+from flask import Blueprint, Response, request, jsonify, has_request_context
+import atexit
+import threading
+import time
+import json
+from metrics import InstrumentedArm
+from telemetry import TelemetryRing
+from arm_supervisor import ArmSupervisor
+from device_owner import caller_source
+
+robot = Blueprint('robot', __name__)
+
+# Set up by init_robot()
+arm_supervisor = None
+telemetry = None
+journal = None
+
+def create_arm(robot_config):
+    """Create the robot arm backend selected in config.yaml"""
+    port = robot_config.get('port', '/dev/ttyAMA0')
+    baudrate = robot_config.get('baudrate', 1000000)
+    if robot_config.get('backend', 'hardware') == 'simulated':
+        from sim_arm import SimulatedMechArm270
+        return SimulatedMechArm270(port, baudrate,
+                                   home_position=robot_config.get('home_position'),
+                                   **robot_config.get('simulator', {}))
+    from pymycobot import MechArm270
+    return MechArm270(port, baudrate)
+
+def init_robot(config, metrics, device_client=None):
+    """Create the arm supervisor and telemetry buffer; returns the blueprint
+
+    With a device_client, the arm and telemetry live in the device owner
+    process and calls are forwarded to it.
+    """
+    global arm_supervisor, telemetry, journal
+    robot_config = config.get('robot', {})
+
+    if device_client is not None:
+        from device_owner import RemoteObject, RemoteArmSupervisor
+        # Label forwarded calls with the route or thread that made them
+        device_client.source = call_source
+        telemetry = RemoteObject(device_client, 'telemetry')
+        if config.get('journal', {}).get('enabled', False):
+            journal = RemoteObject(device_client, 'journal')
+        arm_supervisor = RemoteArmSupervisor(
+            device_client, InstrumentedArm(RemoteObject(device_client, 'arm'), metrics))
+        return robot
+
+    # In-memory history of the poses returned by /robot/status
+    telemetry = TelemetryRing(config.get('telemetry', {}).get('capacity', 100000))
+
+    # Every arm call, in order, for post-mortems and replay (see journal.py)
+    journal_config = dict(config.get('journal', {}))
+    if journal_config.pop('enabled', False):
+        from journal import CommandJournal
+        journal = CommandJournal(source=call_source, **journal_config)
+        atexit.register(journal.close)
+
+    # Robot arm connection, opened in the background on first use
+    journal_listeners = [journal.record] if journal is not None else []
+    arm_supervisor = ArmSupervisor(
+        lambda: InstrumentedArm(create_arm(robot_config), metrics,
+                                listeners=[arm_supervisor.observe_call] + journal_listeners),
+        **robot_config.get('supervisor', {}))
+    return robot
+
+def call_source():
+    """Who issued an arm call: the route for request threads, else the thread name
+
+    In the device owner, calls forwarded by a worker carry the worker's label.
+    """
+    if has_request_context():
+        return f"{request.method} {request.path}"
+    return caller_source() or threading.current_thread().name
+
+def journal_stats():
+    """Journal counters, fetched from the device owner in multi-process mode"""
+    if journal is None:
+        return None
+    try:
+        return journal.get_stats()
+    except Exception as e:
+        return {"error": str(e)}
+
+def robot_health():
+    """Robot fields of the /health response"""
+    return {
+        "robot_connected": arm_supervisor.connected,
+        "robot_connection": arm_supervisor.status(),
+        "journal": journal_stats()
+    }
+
+ROBOT_DOCS = {
+    "GET /robot/status": "Get current robot status",
+    "GET /robot/history": "Recorded status telemetry {start, end, last: seconds, buckets: int, format: json|binary}",
+    "POST /robot/move/coords": "Move to coordinates {coords: [x,y,z,rx,ry,rz], speed: int}",
+    "POST /robot/move/angles": "Move to joint angles {angles: [j1,j2,j3,j4,j5,j6], speed: int}",
+    "POST /robot/jog": "Jog joint {joint_id: int, increment: float, speed: int}",
+    "POST /robot/home": "Move to home position",
+    "POST /robot/gripper/open": "Open gripper {speed: int}",
+    "POST /robot/gripper/close": "Close gripper {speed: int}",
+    "POST /robot/shuffle": "Shuffle movement {speed: int, times: int}",
+    "POST /robot/wave": "Wave gesture"
+}
+
+# Robot Control API Endpoints
+
+@robot.route('/robot/status', methods=['GET'])
+def robot_status():
+    """Get current robot arm status"""
+    arm = arm_supervisor.get()
+    if not arm:
+        return jsonify({"error": "Robot arm not connected"}), 503
+        
+    try:
+        status = {
+            "coords": arm.get_coords(),
+            "angles": arm.get_angles(),
+            "gripper": arm.get_gripper_value(),
+            "error_info": arm.get_error_information(),
+            "fresh_mode": arm.get_fresh_mode(),
+            "gripper_protect_current": arm.get_gripper_protect_current(),
+            "angles_coords": arm.get_angles_coords(),
+            "HTS_gripper_torque": arm.get_HTS_gripper_torque(),
+            "world_reference": arm.get_world_reference(),
+            "tool_reference": arm.get_tool_reference(),
+            "reference_frame": arm.get_reference_frame(),
+            "movement_type": arm.get_movement_type()
+        }
+        telemetry.record(status["angles"], status["coords"], status["gripper"],
+                         status["HTS_gripper_torque"], status["error_info"])
+        return jsonify(status)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@robot.route('/robot/history', methods=['GET'])
+def robot_history():
+    """Get recorded telemetry for a time range, optionally downsampled"""
+    try:
+        start = request.args.get('start', type=float)
+        end = request.args.get('end', type=float)
+        last = request.args.get('last', type=float)
+        buckets = request.args.get('buckets', 0, type=int)
+        fmt = request.args.get('format', 'json')
+        if last is not None:
+            start = time.time() - last
+
+        samples = telemetry.query(start, end)
+        if buckets > 0:
+            samples = TelemetryRing.downsample(samples, buckets)
+
+        if fmt == 'binary':
+            body, descr = TelemetryRing.to_binary(samples)
+            response = Response(body, mimetype='application/octet-stream')
+            response.headers['X-Telemetry-Dtype'] = json.dumps(descr)
+            response.headers['X-Telemetry-Count'] = str(len(samples['timestamp']))
+            return response
+        if fmt != 'json':
+            return jsonify({"error": "Format must be 'json' or 'binary'"}), 400
+
+        return jsonify({
+            "count": len(samples['timestamp']),
+            "downsampled": buckets > 0,
+            "samples": TelemetryRing.to_json(samples)
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@robot.route('/robot/move/coords', methods=['POST'])
+def move_coords():
+    """Move robot to specific coordinates"""
+    arm = arm_supervisor.get()
+    if not arm:
+        return jsonify({"error": "Robot arm not connected"}), 503
+        
+    data = request.get_json()
+    if not data:
+        return jsonify({"error": "No JSON data provided"}), 400
+        
+    try:
+        coords = data.get('coords', [])
+        speed = data.get('speed', 50)
+        
+        if len(coords) != 6:
+            return jsonify({"error": "Coordinates must be a list of 6 values [x, y, z, rx, ry, rz]"}), 400
+            
+        arm.send_coords(coords, speed)
+        return jsonify({"success": True, "message": f"Moving to coordinates {coords} at speed {speed}"})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@robot.route('/robot/move/angles', methods=['POST'])
+def move_angles():
+    """Move robot to specific joint angles"""
+    arm = arm_supervisor.get()
+    if not arm:
+        return jsonify({"error": "Robot arm not connected"}), 503
+        
+    data = request.get_json()
+    if not data:
+        return jsonify({"error": "No JSON data provided"}), 400
+        
+    try:
+        angles = data.get('angles', [])
+        speed = data.get('speed', 50)
+        
+        if len(angles) != 6:
+            return jsonify({"error": "Angles must be a list of 6 values [j1, j2, j3, j4, j5, j6]"}), 400
+            
+        arm.send_angles(angles, speed)
+        return jsonify({"success": True, "message": f"Moving to angles {angles} at speed {speed}"})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@robot.route('/robot/jog', methods=['POST'])
+def jog_joint():
+    """Jog a specific joint by increment"""
+    arm = arm_supervisor.get()
+    if not arm:
+        return jsonify({"error": "Robot arm not connected"}), 503
+        
+    data = request.get_json()
+    if not data:
+        return jsonify({"error": "No JSON data provided"}), 400
+        
+    try:
+        joint_id = data.get('joint_id', 1)
+        increment = data.get('increment', 0)
+        speed = data.get('speed', 50)
+        
+        if joint_id < 1 or joint_id > 6:
+            return jsonify({"error": "Joint ID must be between 1 and 6"}), 400
+            
+        arm.jog_increment_angle(joint_id, increment, speed)
+        return jsonify({"success": True, "message": f"Jogging joint {joint_id} by {increment} degrees at speed {speed}"})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@robot.route('/robot/home', methods=['POST'])
+def go_home():
+    """Move robot to home position"""
+    arm = arm_supervisor.get()
+    if not arm:
+        return jsonify({"error": "Robot arm not connected"}), 503
+        
+    # Accept JSON data but don't require it
+    data = request.get_json(silent=True) or {}
+        
+    try:
+        home_coords = [118.7, 83.8, 280.6, -86.04, -2.15, -55.0]
+        arm.send_coords(home_coords, 100)
+        return jsonify({"success": True, "message": "Moving to home position"})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@robot.route('/robot/gripper/open', methods=['POST'])
+def open_gripper():
+    """Open the gripper"""
+    arm = arm_supervisor.get()
+    if not arm:
+        return jsonify({"error": "Robot arm not connected"}), 503
+        
+    data = request.get_json() or {}
+    speed = data.get('speed', 100)
+    
+    try:
+        arm.set_gripper_value(100, speed, 1)
+        return jsonify({"success": True, "message": f"Opening gripper at speed {speed}"})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@robot.route('/robot/gripper/close', methods=['POST'])
+def close_gripper():
+    """Close the gripper"""
+    arm = arm_supervisor.get()
+    if not arm:
+        return jsonify({"error": "Robot arm not connected"}), 503
+        
+    data = request.get_json() or {}
+    speed = data.get('speed', 100)
+    
+    try:
+        arm.set_gripper_value(0, speed, 1)
+        return jsonify({"success": True, "message": f"Closing gripper at speed {speed}"})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@robot.route('/robot/shuffle', methods=['POST'])
+def shuffle():
+    """Perform shuffle movement"""
+    arm = arm_supervisor.get()
+    if not arm:
+        return jsonify({"error": "Robot arm not connected"}), 503
+        
+    data = request.get_json() or {}
+    speed = data.get('speed', 50)
+    times = data.get('times', 2)
+    
+    try:
+        # Start shuffle in a separate thread to avoid blocking
+        def shuffle_movement():
+            arm.send_coords([100.0, 0, 170, -175, 15, -170], speed)
+            for i in range(times):
+                arm.send_coords([100.0, 0, 170, -175, 15, -170], speed)
+                time.sleep(0.1)
+                arm.send_coords([170.0, 0, 170, -175, 15, -170], speed)
+                time.sleep(0.1)
+        
+        shuffle_thread = threading.Thread(target=shuffle_movement, name='shuffle')
+        shuffle_thread.daemon = True
+        shuffle_thread.start()
+        
+        return jsonify({"success": True, "message": f"Shuffling {times} times at speed {speed}"})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@robot.route('/robot/wave', methods=['POST'])
+def wave():
+    """Perform wave gesture"""
+    arm = arm_supervisor.get()
+    if not arm:
+        return jsonify({"error": "Robot arm not connected"}), 503
+        
+    # Accept JSON data but don't require it
+    data = request.get_json(silent=True) or {}
+        
+    try:
+        def wave_movement():
+            start = [100, -8, -40, 0, -70, -100]
+            end = [105, 0, -40, 10, -30, -90]
+            for _ in range(3):
+                arm.send_angles(start, 100)
+                time.sleep(0.5)
+                arm.send_angles(end, 100)
+                time.sleep(0.5)
+        
+        wave_thread = threading.Thread(target=wave_movement, name='wave')
+        wave_thread.daemon = True
+        wave_thread.start()
+        
+        return jsonify({"success": True, "message": "Performing wave gesture"})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
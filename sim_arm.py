@@ -0,0 +1,224 @@
+import random
+import threading
+import time
+
+# Joint limits of the mechArm 270 in degrees (J1..J6)
+JOINT_LIMITS = [
+    (-165.0, 165.0),
+    (-90.0, 90.0),
+    (-180.0, 70.0),
+    (-165.0, 165.0),
+    (-115.0, 115.0),
+    (-175.0, 175.0),
+]
+
+# Bytes on the wire for a typical request/reply frame of the mycobot protocol
+COMMAND_FRAME_BYTES = 8
+REPLY_FRAME_BYTES = 20
+
+
+class SimulatedSerialError(IOError):
+    """Raised when the simulated serial link fails a command"""
+
+
+class _Motion:
+    """Linear interpolation of a vector from start to target over a duration"""
+
+    def __init__(self, start, target, duration):
+        self.start = list(start)
+        self.target = list(target)
+        self.started_at = time.monotonic()
+        self.duration = max(duration, 0.0)
+
+    def position(self, now):
+        if self.duration <= 0:
+            return list(self.target)
+        t = min((now - self.started_at) / self.duration, 1.0)
+        return [s + (e - s) * t for s, e in zip(self.start, self.target)]
+
+    def done(self, now):
+        return now - self.started_at >= self.duration
+
+
+class SimulatedMechArm270:
+    """Software stand-in for pymycobot.MechArm270
+
+    Keeps joint, Cartesian and gripper state that moves over time at the
+    commanded speed, and emulates the serial bus: commands are serialized on
+    one port and each one pays transmission time plus latency and jitter.
+    Joint and Cartesian space are interpolated independently; there is no
+    kinematic model linking them.
+    """
+
+    def __init__(self, port="/dev/ttyAMA0", baudrate=1000000, latency_ms=6.0,
+                 jitter_ms=2.0, error_rate=0.0, max_joint_speed=160.0,
+                 max_linear_speed=200.0, max_gripper_speed=200.0,
+                 home_position=None, seed=None):
+        self.port = port
+        self.baudrate = baudrate
+        self.latency = latency_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self.error_rate = error_rate
+        self.max_joint_speed = max_joint_speed
+        self.max_linear_speed = max_linear_speed
+        self.max_gripper_speed = max_gripper_speed
+        self.connected = True
+
+        self._random = random.Random(seed)
+        self._serial_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+
+        coords = home_position or [118.7, 83.8, 280.6, -86.04, -2.15, -55.0]
+        self._angles = _Motion([0.0] * 6, [0.0] * 6, 0)
+        self._coords = _Motion(coords, coords, 0)
+        self._gripper = _Motion([100.0], [100.0], 0)
+
+    # Serial bus emulation
+
+    def _transfer_time(self, nbytes):
+        # 8N1 framing: 10 bits on the wire per byte
+        return nbytes * 10.0 / self.baudrate
+
+    def _transact(self, expects_reply):
+        """Hold the port for the duration of one command round trip"""
+        with self._serial_lock:
+            if not self.connected:
+                raise SimulatedSerialError(f"Serial port {self.port} is not open")
+            # Writes pay the controller's processing latency too, not just the wire time
+            delay = self._transfer_time(COMMAND_FRAME_BYTES)
+            delay += max(0.0, self._random.gauss(self.latency, self.jitter))
+            if expects_reply:
+                delay += self._transfer_time(REPLY_FRAME_BYTES)
+            time.sleep(delay)
+            if self.error_rate and self._random.random() < self.error_rate:
+                raise SimulatedSerialError(f"Timed out waiting for reply on {self.port}")
+
+    def disconnect(self):
+        """Simulate the serial link going away"""
+        self.connected = False
+
+    def close(self):
+        self.connected = False
+
+    # Motion helpers
+
+    def _speed_fraction(self, speed):
+        return min(max(speed, 1), 100) / 100.0
+
+    def _move(self, motion, target, max_speed, speed):
+        now = time.monotonic()
+        start = motion.position(now)
+        distance = max(abs(e - s) for s, e in zip(start, target))
+        duration = distance / (max_speed * self._speed_fraction(speed))
+        return _Motion(start, target, duration)
+
+    def _clamp_angles(self, angles):
+        return [min(max(float(a), lo), hi) for a, (lo, hi) in zip(angles, JOINT_LIMITS)]
+
+    def _current(self, motion):
+        with self._state_lock:
+            return [round(v, 2) for v in motion.position(time.monotonic())]
+
+    # Commands
+
+    def send_angles(self, angles, speed):
+        self._transact(expects_reply=False)
+        target = self._clamp_angles(angles)
+        with self._state_lock:
+            self._angles = self._move(self._angles, target, self.max_joint_speed, speed)
+
+    def send_angle(self, joint_id, angle, speed):
+        self._transact(expects_reply=False)
+        with self._state_lock:
+            target = self._angles.position(time.monotonic())
+            target[joint_id - 1] = angle
+            target = self._clamp_angles(target)
+            self._angles = self._move(self._angles, target, self.max_joint_speed, speed)
+
+    def send_coords(self, coords, speed, mode=0):
+        self._transact(expects_reply=False)
+        target = [float(c) for c in coords]
+        with self._state_lock:
+            self._coords = self._move(self._coords, target, self.max_linear_speed, speed)
+
+    def jog_increment_angle(self, joint_id, increment, speed):
+        self._transact(expects_reply=False)
+        with self._state_lock:
+            target = self._angles.position(time.monotonic())
+            target[joint_id - 1] += increment
+            target = self._clamp_angles(target)
+            self._angles = self._move(self._angles, target, self.max_joint_speed, speed)
+
+    def set_gripper_value(self, gripper_value, speed, gripper_type=None):
+        self._transact(expects_reply=False)
+        target = [float(min(max(gripper_value, 0), 100))]
+        with self._state_lock:
+            self._gripper = self._move(self._gripper, target, self.max_gripper_speed, speed)
+
+    def stop(self):
+        self._transact(expects_reply=False)
+        now = time.monotonic()
+        with self._state_lock:
+            for name in ('_angles', '_coords', '_gripper'):
+                here = getattr(self, name).position(now)
+                setattr(self, name, _Motion(here, here, 0))
+
+    def is_moving(self):
+        self._transact(expects_reply=True)
+        now = time.monotonic()
+        with self._state_lock:
+            moving = not (self._angles.done(now) and self._coords.done(now)
+                          and self._gripper.done(now))
+        return 1 if moving else 0
+
+    # Queries
+
+    def get_angles(self):
+        self._transact(expects_reply=True)
+        return self._current(self._angles)
+
+    def get_coords(self):
+        self._transact(expects_reply=True)
+        return self._current(self._coords)
+
+    def get_angles_coords(self):
+        self._transact(expects_reply=True)
+        return self._current(self._angles) + self._current(self._coords)
+
+    def get_gripper_value(self, gripper_type=None):
+        self._transact(expects_reply=True)
+        return int(round(self._current(self._gripper)[0]))
+
+    def get_HTS_gripper_torque(self):
+        self._transact(expects_reply=True)
+        # Torque builds up as the jaws close on an object
+        closed = 100.0 - self._current(self._gripper)[0]
+        return int(closed * 3 + self._random.gauss(0, 5)) if closed > 0 else 0
+
+    def get_error_information(self):
+        self._transact(expects_reply=True)
+        return 0
+
+    def get_fresh_mode(self):
+        self._transact(expects_reply=True)
+        return 0
+
+    def get_gripper_protect_current(self):
+        self._transact(expects_reply=True)
+        return 300
+
+    def get_world_reference(self):
+        self._transact(expects_reply=True)
+        return [0.0] * 6
+
+    def get_tool_reference(self):
+        self._transact(expects_reply=True)
+        return [0.0] * 6
+
+    def get_reference_frame(self):
+        self._transact(expects_reply=True)
+        return 0
+
+    def get_movement_type(self):
+        self._transact(expects_reply=True)
+        return 0
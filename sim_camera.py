@@ -0,0 +1,51 @@
+import time
+import zlib
+import numpy as np
+
+
+class SimulatedCamera:
+    """Stand-in for cv2.VideoCapture that produces synthetic frames
+
+    read() blocks until the next frame is due, as a real device does, so
+    capture threads and camera_lock see hardware-like timing. Frames are a
+    textured gradient scrolled by one step per frame, which gives JPEG
+    encoding a realistic amount of work.
+    """
+
+    def __init__(self, camera_id, width=640, height=480, fps=30.0, seed=None):
+        self.camera_id = camera_id
+        self.width = width
+        self.height = height
+        self.interval = 1.0 / fps if fps > 0 else 0.0
+        # crc32 rather than hash(), which PYTHONHASHSEED changes from run to run
+        if seed is None:
+            seed = zlib.crc32(str(camera_id).encode()) & 0xffff
+        rng = np.random.default_rng(seed)
+        x = np.linspace(0, 255, width, dtype=np.float32)
+        y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+        base = np.stack([np.broadcast_to(x, (height, width)),
+                         np.broadcast_to(y, (height, width)),
+                         (x + y) / 2], axis=-1)
+        base += rng.normal(0, 12, base.shape).astype(np.float32)
+        self._base = np.clip(base, 0, 255).astype(np.uint8)
+        self._frames = 0
+        self._next_at = time.monotonic()
+        self._open = True
+
+    def isOpened(self):
+        return self._open
+
+    def read(self):
+        if not self._open:
+            return False, None
+        if self.interval:
+            now = time.monotonic()
+            if self._next_at > now:
+                time.sleep(self._next_at - now)
+            # Fall behind rather than burst when the reader is slow
+            self._next_at = max(self._next_at, now) + self.interval
+        self._frames += 1
+        return True, np.roll(self._base, self._frames * 4, axis=1)
+
+    def release(self):
+        self._open = False
@@ -0,0 +1,152 @@
+// Update timestamp
+function updateTimestamp() {
+    document.getElementById('timestamp').textContent =
+        'timestamp: ' + new Date().toISOString().toLowerCase();
+}
+setInterval(updateTimestamp, 1000);
+updateTimestamp();
+
+// Update speed display
+document.getElementById('speed').addEventListener('input', function() {
+    document.getElementById('speed-value').textContent = this.value;
+});
+
+// Logging function
+function log(message, type = 'info') {
+    const logContent = document.getElementById('log-content');
+    const timestamp = new Date().toISOString().toLowerCase();
+    const logLine = `${timestamp} > ${message}\n`;
+    logContent.textContent += logLine;
+    logContent.scrollTop = logContent.scrollHeight;
+
+    // Add glitch effect for errors
+    if (type === 'error') {
+        document.body.classList.add('glitch');
+        setTimeout(() => document.body.classList.remove('glitch'), 300);
+    }
+}
+
+// API request function
+async function makeRequest(endpoint, method = 'GET', data = null) {
+    try {
+        document.getElementById('status').textContent = 'status: processing...';
+
+        // Clean up endpoint - remove leading slash if present
+        const cleanEndpoint = endpoint.startsWith('/') ? endpoint.substring(1) : endpoint;
+
+        const options = {
+            method: method,
+            headers: {
+                'Content-Type': 'application/json',
+            }
+        };
+
+        // Always send JSON body for POST requests, even if empty
+        if (method === 'POST') {
+            options.body = JSON.stringify(data || {});
+        }
+
+        const response = await fetch('/api/' + cleanEndpoint, options);
+        const result = await response.json();
+
+        if (result.success) {
+            log(JSON.stringify(result.data, null, 2), 'success');
+            document.getElementById('status').textContent = 'status: ready';
+            return result.data;
+        } else {
+            log('error: ' + result.error, 'error');
+            document.getElementById('status').textContent = 'status: error';
+            return null;
+        }
+    } catch (error) {
+        log('connection_error: ' + error.message, 'error');
+        document.getElementById('status').textContent = 'status: connection_failed';
+        return null;
+    }
+}
+
+// Movement functions
+async function moveCoords() {
+    const coords = [
+        parseFloat(document.getElementById('x').value) || 0,
+        parseFloat(document.getElementById('y').value) || 0,
+        parseFloat(document.getElementById('z').value) || 0,
+        parseFloat(document.getElementById('rx').value) || 0,
+        parseFloat(document.getElementById('ry').value) || 0,
+        parseFloat(document.getElementById('rz').value) || 0
+    ];
+    const speed = parseInt(document.getElementById('speed').value);
+
+    log(`move_coords: [${coords.join(', ')}] speed: ${speed}`);
+    await makeRequest('robot/move/coords', 'POST', { coords, speed });
+}
+
+async function moveAngles() {
+    const angles = [
+        parseFloat(document.getElementById('j1').value) || 0,
+        parseFloat(document.getElementById('j2').value) || 0,
+        parseFloat(document.getElementById('j3').value) || 0,
+        parseFloat(document.getElementById('j4').value) || 0,
+        parseFloat(document.getElementById('j5').value) || 0,
+        parseFloat(document.getElementById('j6').value) || 0
+    ];
+    const speed = parseInt(document.getElementById('speed').value);
+
+    log(`move_angles: [${angles.join(', ')}] speed: ${speed}`);
+    await makeRequest('robot/move/angles', 'POST', { angles, speed });
+}
+
+async function jogJoint() {
+    const joint_id = parseInt(document.getElementById('joint-select').value);
+    const increment = parseFloat(document.getElementById('jog-increment').value) || 0;
+    const speed = parseInt(document.getElementById('speed').value);
+
+    log(`jog_joint: ${joint_id} increment: ${increment} speed: ${speed}`);
+    await makeRequest('robot/jog', 'POST', { joint_id, increment, speed });
+}
+
+// Quick action functions
+async function goHome() {
+    log('executing: go_home');
+    await makeRequest('robot/home', 'POST');
+}
+
+async function getRobotStatus() {
+    log('requesting: robot_status');
+    await makeRequest('robot/status');
+}
+
+async function emergencyStop() {
+    log('executing: emergency_stop');
+    // This would need to be implemented in the API
+    alert('emergency stop not implemented in api');
+}
+
+async function openGripper() {
+    const speed = parseInt(document.getElementById('speed').value);
+    log(`gripper_open: speed ${speed}`);
+    await makeRequest('robot/gripper/open', 'POST', { speed });
+}
+
+async function closeGripper() {
+    const speed = parseInt(document.getElementById('speed').value);
+    log(`gripper_close: speed ${speed}`);
+    await makeRequest('robot/gripper/close', 'POST', { speed });
+}
+
+async function performShuffle() {
+    const speed = parseInt(document.getElementById('speed').value);
+    log(`shuffle_sequence: speed ${speed}`);
+    await makeRequest('robot/shuffle', 'POST', { speed, times: 3 });
+}
+
+async function performWave() {
+    log('wave_gesture: executing');
+    await makeRequest('robot/wave', 'POST');
+}
+
+// Initialize
+window.onload = function() {
+    log('interface_initialized');
+    getRobotStatus();
+};
@@ -0,0 +1,147 @@
+import threading
+import time
+import numpy as np
+
+# Column layout of one telemetry sample: name -> (dtype, width)
+COLUMNS = {
+    'timestamp': ('<f8', 1),
+    'angles': ('<f4', 6),
+    'coords': ('<f4', 6),
+    'gripper': ('<f4', 1),
+    'torque': ('<f4', 1),
+    'error_code': ('<i4', 1),
+}
+
+# Columns that are summarized with min/max/mean when downsampling
+NUMERIC_COLUMNS = ('angles', 'coords', 'gripper', 'torque', 'error_code')
+
+
+def _vector(value, width):
+    """Coerce an arm reading into a float vector, NaN where the reading is unusable"""
+    if isinstance(value, (int, float)):
+        values = [float(value)]
+    else:
+        try:
+            values = [float(v) for v in value]
+        except (TypeError, ValueError):
+            values = []
+    if len(values) != width:
+        return [float('nan')] * width
+    return values
+
+
+def _structured(columns, arrays):
+    """Pack per-column arrays into one structured array for binary export"""
+    fields = []
+    for name in columns:
+        array = arrays[name]
+        shape = array.shape[1:]
+        fields.append((name, array.dtype.str, shape) if shape else (name, array.dtype.str))
+    packed = np.empty(len(arrays[columns[0]]), dtype=fields)
+    for name in columns:
+        packed[name] = arrays[name]
+    return packed
+
+
+def _jsonable(array):
+    """Convert an array to nested lists, mapping NaN to None"""
+    if array.dtype.kind != 'f':
+        return array.tolist()
+    result = array.astype(object)
+    result[np.isnan(array)] = None
+    return result.tolist()
+
+
+class TelemetryRing:
+    """Fixed-size, column-oriented ring buffer of arm telemetry samples"""
+
+    def __init__(self, capacity=100000):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._columns = {}
+        for name, (dtype, width) in COLUMNS.items():
+            shape = (capacity, width) if width > 1 else (capacity,)
+            self._columns[name] = np.zeros(shape, dtype=dtype)
+        self._head = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def nbytes(self):
+        return sum(column.nbytes for column in self._columns.values())
+
+    def record(self, angles, coords, gripper, torque, error_code, timestamp=None):
+        """Append one sample, overwriting the oldest once the ring is full"""
+        if timestamp is None:
+            timestamp = time.time()
+        error = _vector(error_code, 1)[0]
+        row = {
+            'timestamp': timestamp,
+            'angles': _vector(angles, 6),
+            'coords': _vector(coords, 6),
+            'gripper': _vector(gripper, 1)[0],
+            'torque': _vector(torque, 1)[0],
+            'error_code': -1 if np.isnan(error) else int(error),
+        }
+        with self._lock:
+            for name, value in row.items():
+                self._columns[name][self._head] = value
+            self._head = (self._head + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+
+    def _segments(self):
+        """Slices of the ring in chronological order"""
+        if self._count < self.capacity:
+            return [slice(0, self._count)]
+        return [slice(self._head, self.capacity), slice(0, self._head)]
+
+    def query(self, start=None, end=None):
+        """Copy out the samples with start <= timestamp <= end, oldest first"""
+        start = -np.inf if start is None else start
+        end = np.inf if end is None else end
+        with self._lock:
+            timestamps = self._columns['timestamp']
+            indices = []
+            for segment in self._segments():
+                ts = timestamps[segment]
+                lo = np.searchsorted(ts, start, side='left')
+                hi = np.searchsorted(ts, end, side='right')
+                indices.append(np.arange(segment.start + lo, segment.start + hi))
+            index = np.concatenate(indices)
+            return {name: column[index] for name, column in self._columns.items()}
+
+    @staticmethod
+    def downsample(samples, buckets):
+        """Reduce samples to at most `buckets` equal-time buckets of min/max/mean"""
+        timestamps = samples['timestamp']
+        if len(timestamps) == 0 or buckets <= 0:
+            return {'timestamp': timestamps, 'count': np.zeros(0, dtype='<i4')}
+        edges = np.linspace(timestamps[0], timestamps[-1], buckets + 1)
+        bounds = np.searchsorted(timestamps, edges[:-1], side='left')
+        bounds = np.unique(bounds)
+        counts = np.diff(np.append(bounds, len(timestamps)))
+        result = {
+            'timestamp': timestamps[bounds],
+            'count': counts.astype('<i4'),
+        }
+        for name in NUMERIC_COLUMNS:
+            values = samples[name].astype('<f4')
+            result[name + '_min'] = np.fmin.reduceat(values, bounds, axis=0)
+            result[name + '_max'] = np.fmax.reduceat(values, bounds, axis=0)
+            sums = np.add.reduceat(np.nan_to_num(values), bounds, axis=0)
+            valid = np.add.reduceat((~np.isnan(values)).astype('<i4'), bounds, axis=0)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                result[name + '_mean'] = np.where(valid > 0, sums / np.maximum(valid, 1), np.nan).astype('<f4')
+        return result
+
+    @staticmethod
+    def to_json(samples):
+        return {name: _jsonable(array) for name, array in samples.items()}
+
+    @staticmethod
+    def to_binary(samples):
+        """Pack samples as little-endian records; returns (bytes, numpy dtype descr)"""
+        packed = _structured(list(samples), samples)
+        return packed.tobytes(), packed.dtype.descr
@@ -0,0 +1,28 @@
+import time
+import pytest
+
+SIMULATED_ROBOT = {
+    'robot': {'backend': 'simulated', 'simulator': {'latency_ms': 0, 'jitter_ms': 0}},
+    'cameras': [],
+}
+
+
+def make_api_app(**sections):
+    """api.py app for the robot role on the simulated arm, once it is connected"""
+    import api
+    import robot_api
+    config = dict(SIMULATED_ROBOT, **sections)
+    app = api.create_app('robot', config)
+    robot_api.arm_supervisor.start()
+    deadline = time.monotonic() + 5
+    while not robot_api.arm_supervisor.connected and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return app
+
+
+@pytest.fixture
+def api_app():
+    import robot_api
+    app = make_api_app()
+    yield app
+    robot_api.arm_supervisor.stop()
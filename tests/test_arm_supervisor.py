@@ -0,0 +1,73 @@
+import time
+from arm_supervisor import ArmSupervisor, CONNECTED
+from metrics import InstrumentedArm, MetricsRegistry
+from sim_arm import SimulatedMechArm270
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def supervisor(factory, **kwargs):
+    options = dict(probe_interval=0.05, probe_timeout=0.5, failure_threshold=2,
+                   backoff_initial=0.02, backoff_max=0.05)
+    options.update(kwargs)
+    return ArmSupervisor(factory, **options)
+
+
+def test_connects_in_background_after_failures():
+    attempts = []
+
+    def factory():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise OSError('no such port')
+        return object()
+
+    sup = supervisor(factory)
+    try:
+        assert sup.get() is None
+        assert wait_until(lambda: sup.connected)
+        assert len(attempts) == 3
+        assert sup.status()['connects'] == 1 and sup.status()['reconnects'] == 0
+        assert sup.get() is not None
+    finally:
+        sup.stop()
+
+
+def test_repeated_call_failures_trigger_reconnect():
+    arms = []
+
+    def factory():
+        arm = SimulatedMechArm270(latency_ms=0, jitter_ms=0)
+        arms.append(arm)
+        return InstrumentedArm(arm, MetricsRegistry(), listeners=[sup.observe_call])
+
+    sup = supervisor(factory)
+    try:
+        sup.start()
+        assert wait_until(lambda: sup.connected)
+        # The serial link goes away; the periodic probe notices and reconnects
+        arms[0].disconnect()
+        assert wait_until(lambda: sup.status()['reconnects'] == 1)
+        assert sup.state == CONNECTED
+        assert sup.get().get_angles() == [0.0] * 6
+        assert arms[0].connected is False and len(arms) == 2
+    finally:
+        sup.stop()
+
+
+def test_bad_and_slow_readings_count_as_failures():
+    sup = supervisor(lambda: object(), failure_threshold=10)
+    sup.observe_call('get_angles', (), {}, -1, None, 0.0, 0.01)
+    sup.observe_call('get_coords', (), {}, None, None, 0.0, 0.01)
+    sup.observe_call('get_angles', (), {}, [0] * 6, None, 0.0, 5.0)
+    assert sup.consecutive_failures == 3
+    assert 'took' in sup.last_error
+    sup.observe_call('send_angles', (), {}, None, None, 0.0, 0.01)
+    assert sup.consecutive_failures == 0
@@ -0,0 +1,70 @@
+from flask import abort
+import pytest
+import api
+
+
+@pytest.fixture
+def client(api_app):
+    @api_app.route('/test/teapot', methods=['POST'])
+    def teapot():
+        abort(418)
+
+    return api_app.test_client()
+
+
+def run(client, operations, **options):
+    response = client.post('/batch', json=dict(options, operations=operations))
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_operations_run_in_order(client):
+    result = run(client, [
+        {'path': '/robot/gripper/open', 'method': 'POST'},
+        {'sleep': 0.01},
+        {'path': '/robot/move/angles', 'body': {'angles': [1, 2, 3, 4, 5, 6], 'speed': 50}},
+        {'path': '/robot/status'},
+    ])
+    assert result['success'] and result['completed'] == 4
+    assert [r['status'] for r in result['results']] == [200, 200, 200, 200]
+    assert result['results'][1]['data'] == {'slept': 0.01}
+    assert 'angles' in result['results'][3]['data']
+
+
+def test_statuses_come_from_the_route(client):
+    result = run(client, [
+        {'path': '/robot/home'},
+        {'path': '/test/teapot', 'method': 'POST'},
+        {'path': '/nowhere'},
+        {'path': '/batch', 'method': 'POST'},
+        {'sleep': 60},
+    ], on_error='continue')
+    assert not result['success'] and result['completed'] == 5
+    assert [r['status'] for r in result['results']] == [405, 418, 404, 400, 400]
+
+
+def test_stop_on_first_error(client):
+    result = run(client, [{'path': '/nowhere'}, {'path': '/robot/status'}])
+    assert not result['success']
+    assert (result['completed'], result['total']) == (1, 2)
+
+
+def test_bad_requests(client):
+    assert client.post('/batch', json={'operations': []}).status_code == 400
+    assert client.post('/batch', json={'operations': [{}], 'on_error': 'retry'}).status_code == 400
+
+
+def metric(client, line_prefix):
+    for line in client.get('/metrics').get_data(as_text=True).splitlines():
+        if line.startswith(line_prefix + ' '):
+            return float(line.split()[-1])
+    return 0.0
+
+
+def test_batch_is_timed_as_one_request(client):
+    series = 'http_request_duration_seconds_count{method="POST",route="/batch",status="200"}'
+    before = metric(client, series)
+    run(client, [{'path': '/robot/status'}, {'path': '/robot/gripper/close', 'method': 'POST'}])
+    assert metric(client, series) == before + 1
+    # Only the /metrics request itself is still in flight
+    assert metric(client, 'http_requests_in_flight') == 1
@@ -0,0 +1,55 @@
+import gzip
+import pytest
+from dashboard import Asset, Dashboard, IMMUTABLE, REVALIDATE
+
+BODY = b'body { color: #333; }\n' * 200
+
+
+@pytest.fixture
+def asset():
+    return Asset(BODY, 'text/css', IMMUTABLE)
+
+
+def test_smallest_accepted_encoding(asset):
+    status, headers, body = asset.respond(None, 'gzip, deflate')
+    assert status == 200 and headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(body) == BODY
+    assert headers['Vary'] == 'Accept-Encoding'
+
+
+def test_identity_without_accept_encoding(asset):
+    status, headers, body = asset.respond(None, None)
+    assert body == BODY and 'Content-Encoding' not in headers
+
+
+@pytest.mark.parametrize('header', ['gzip;q=0', 'gzip; q=0.0, br;q=0', 'identity', '*;q=0'])
+def test_refused_encodings_are_not_sent(asset, header):
+    status, headers, body = asset.respond(None, header)
+    assert body == BODY and 'Content-Encoding' not in headers
+
+
+def test_wildcard_accepts_gzip(asset):
+    assert asset.respond(None, '*')[1]['Content-Encoding'] in ('gzip', 'br')
+    assert asset.respond(None, 'br;q=0, *')[1]['Content-Encoding'] == 'gzip'
+
+
+def test_matching_etag_gets_304(asset):
+    status, headers, body = asset.respond(f'"other", {asset.etag}', 'gzip')
+    assert (status, body) == (304, b'')
+    assert headers['ETag'] == asset.etag and headers['Cache-Control'] == IMMUTABLE
+    assert asset.respond('"other"', 'gzip')[0] == 200
+
+
+def test_etag_follows_content():
+    assert Asset(BODY, 'text/css', IMMUTABLE).etag == Asset(BODY, 'text/css', IMMUTABLE).etag
+    assert Asset(BODY + b'x', 'text/css', IMMUTABLE).etag != Asset(BODY, 'text/css', IMMUTABLE).etag
+
+
+def test_dashboard_links_hashed_assets():
+    dashboard = Dashboard('http://robot:8044', [{'id': 0, 'name': 'cam_00'}])
+    page = dashboard.page.body.decode()
+    assert dashboard.page.cache_control == REVALIDATE
+    assert dashboard.assets
+    for name, asset in dashboard.assets.items():
+        assert asset.digest in name
+        assert f'/assets/{name}' in page
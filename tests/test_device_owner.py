@@ -0,0 +1,85 @@
+import os
+import threading
+import pytest
+from device_owner import (DeviceClient, DeviceOwner, DeviceUnavailable, RemoteArmSupervisor,
+                          RemoteCallError, RemoteObject)
+from journal import read_journals
+
+
+@pytest.fixture
+def owner(tmp_path):
+    import robot_api
+    config = {
+        'robot': {'backend': 'simulated', 'simulator': {'latency_ms': 0, 'jitter_ms': 0},
+                  'supervisor': {'probe_interval': 0.05}},
+        'journal': {'enabled': True, 'path': str(tmp_path / 'arm.journal'),
+                    'flush_interval': 0.05},
+    }
+    address = str(tmp_path / 'device.sock')
+    authkey = os.urandom(16)
+    ready = threading.Event()
+    thread = threading.Thread(target=DeviceOwner(config, 'robot', ('robot',), address,
+                                                 authkey).serve_forever, args=(ready,))
+    thread.daemon = True
+    thread.start()
+    assert ready.wait(5)
+    client = DeviceClient(address, authkey)
+    supervisor = RemoteArmSupervisor(client, RemoteObject(client, 'arm'), status_ttl=0)
+    for _ in range(500):
+        if supervisor.connected:
+            break
+        threading.Event().wait(0.01)
+    yield client, config
+    robot_api.arm_supervisor.stop()
+
+
+def test_calls_run_on_the_owners_arm(owner):
+    client, _ = owner
+    arm = RemoteObject(client, 'arm')
+    arm.send_angles([10, 0, 0, 0, 0, 0], 100)
+    assert len(arm.get_angles()) == 6
+    assert client.call('owner', 'status')['robot_connected'] is True
+
+
+def test_errors_cross_the_socket(owner):
+    client, _ = owner
+    with pytest.raises(DeviceUnavailable):
+        client.call('vision', 'status')
+    with pytest.raises(RemoteCallError, match='AttributeError'):
+        client.call('arm', '_serial_lock')
+    with pytest.raises(RemoteCallError, match='TypeError'):
+        client.call('arm', 'send_angles')
+
+
+def test_connections_are_pooled_across_threads(owner):
+    client, _ = owner
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(client.call('arm', 'get_coords')))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(results) == 8
+    assert client._idle.qsize() <= 8
+
+
+def test_journal_keeps_the_callers_source(owner):
+    import robot_api
+    client, config = owner
+    client.source = lambda: 'POST /robot/home'
+    client.call('arm', 'send_coords', [1, 2, 3, 4, 5, 6], 50)
+    stats = client.call('journal', 'get_stats')
+    assert stats['path'] == config['journal']['path']
+    robot_api.journal.close()
+    sources = {r.source for r in read_journals(config['journal']['path'])
+               if r.method == 'send_coords'}
+    assert sources == {'POST /robot/home'}
+
+
+def test_unreachable_owner(tmp_path):
+    client = DeviceClient(str(tmp_path / 'missing.sock'), b'key')
+    supervisor = RemoteArmSupervisor(client, RemoteObject(client, 'arm'))
+    assert supervisor.connected is False
+    assert supervisor.status()['state'] == 'owner_unreachable'
+    assert supervisor.get() is None
@@ -0,0 +1,120 @@
+import os
+import numpy as np
+import pytest
+from frame_ring import FrameRingWriter, FrameRingReader, FrameSubscriber, SLOT, ring_name
+
+
+@pytest.fixture
+def writer():
+    ring = FrameRingWriter(f'adum_test_{os.getpid()}', (4, 6, 3), np.uint8, slots=3)
+    yield ring
+    ring.unlink()
+
+
+def frame(value):
+    return np.full((4, 6, 3), value, dtype=np.uint8)
+
+
+def test_reader_sees_shape_and_frames(writer):
+    reader = FrameRingReader(writer.name)
+    try:
+        assert reader.latest() is None
+        seq = writer.publish(frame(7), timestamp=123.0)
+        latest = reader.latest()
+        assert (latest.seq, latest.timestamp) == (seq, 123.0)
+        assert reader.shape == (4, 6, 3) and reader.dtype == np.uint8
+        assert (latest.data == 7).all()
+        assert not latest.data.flags.writeable
+    finally:
+        reader.close()
+
+
+def test_lapped_frames_are_invalid(writer):
+    reader = FrameRingReader(writer.name)
+    try:
+        first = writer.publish(frame(1))
+        assert reader.valid(first)
+        for value in range(2, 2 + writer.slots):
+            writer.publish(frame(value))
+        assert not reader.valid(first)
+        assert reader.get(first) is None
+        assert (reader.get(writer.seq).data == writer.seq).all()
+    finally:
+        reader.close()
+
+
+def test_slot_being_written_is_invalid(writer):
+    reader = FrameRingReader(writer.name)
+    try:
+        seq = writer.publish(frame(1))
+        # The writer zeroes a slot's sequence before copying a frame into it
+        SLOT.pack_into(writer.shm.buf, writer._slot_offsets[seq % writer.slots], 0, 0.0, 0)
+        assert not reader.valid(seq)
+        assert reader.get(seq) is None
+        assert reader.latest() is None
+    finally:
+        reader.close()
+
+
+def test_wrong_shape_is_rejected(writer):
+    with pytest.raises(ValueError):
+        writer.publish(np.zeros((2, 2, 3), dtype=np.uint8))
+
+
+def test_open_missing_ring_returns_none():
+    assert FrameRingReader.open(f'adum_missing_{os.getpid()}') is None
+
+
+def test_ring_name_is_shm_safe():
+    assert ring_name(0) == 'adum_cam_0'
+    assert ring_name('/dev/video2') == 'adum_cam_dev_video2'
+
+
+def test_subscriber_counts_skips_and_reattaches():
+    camera_id = f'test{os.getpid()}'
+    ring = FrameRingWriter(ring_name(camera_id), (4, 6, 3), np.uint8, slots=3)
+    subscriber = FrameSubscriber(camera_id, timeout=0.2, copy=True)
+    try:
+        ring.publish(frame(1))
+        assert subscriber.next().seq == 1
+        ring.publish(frame(2))
+        ring.publish(frame(3))
+        latest = subscriber.next()
+        assert latest.seq == 3 and subscriber.skipped == 1
+        assert latest.data.flags.writeable and (latest.data == 3).all()
+
+        # api.py restarts: a new ring under the same name, numbering from 1 again
+        ring.unlink()
+        ring = FrameRingWriter(ring_name(camera_id), (4, 6, 3), np.uint8, slots=3)
+        ring.publish(frame(9))
+        for _ in range(5):
+            restarted = subscriber.next()
+            if restarted is not None:
+                break
+        assert restarted.seq == 1 and (restarted.data == 9).all()
+    finally:
+        subscriber.close()
+        ring.unlink()
+
+
+def test_subscriber_waits_for_a_missing_ring():
+    subscriber = FrameSubscriber(f'absent{os.getpid()}', timeout=0.05)
+    assert subscriber.next() is None
+    subscriber.close()
+
+
+def test_concurrent_attaches_keep_resource_tracking(writer):
+    import threading
+    from multiprocessing import resource_tracker
+    register = resource_tracker.register
+
+    def attach():
+        for _ in range(100):
+            FrameRingReader(writer.name).close()
+
+    threads = [threading.Thread(target=attach) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert resource_tracker.register is register
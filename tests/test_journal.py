@@ -0,0 +1,92 @@
+import os
+import struct
+import time
+import numpy as np
+from journal import CommandJournal, FILE_HEADER, MAGIC, encode_record, read_journal, read_journals
+
+
+def write_journal(path, records):
+    with open(path, 'wb') as f:
+        f.write(FILE_HEADER.pack(MAGIC, 1000.0, 10.0, 1))
+        for record in records:
+            f.write(record)
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / 'arm.journal')
+    kwargs = {'speed': 50, 'flags': [True, None], 'raw': b'\x01\x02'}
+    write_journal(path, [
+        encode_record('send_angles', ([0.5, -90, 2**40],), kwargs, None, None, 12.0, 0.004,
+                      'POST /robot/move/angles'),
+        encode_record('get_coords', (), {}, np.array([1.5, 2.5]), None, 13.0, 0.002, 'shuffle'),
+        encode_record('get_angles', (), {}, None, IOError('timeout'), 14.0, 0.1, 'wave'),
+    ])
+    records = list(read_journal(path))
+    assert [r.method for r in records] == ['send_angles', 'get_coords', 'get_angles']
+    first = records[0]
+    assert first.args == [[0.5, -90, 2**40]]
+    assert first.kwargs == kwargs
+    assert first.source == 'POST /robot/move/angles'
+    assert first.wall_time == 1002.0 and first.ok
+    assert records[1].result == [1.5, 2.5]
+    assert not records[2].ok and records[2].result == 'OSError: timeout'
+
+
+def test_torn_and_corrupt_tails_are_dropped(tmp_path):
+    good = encode_record('stop', (), {}, None, None, 11.0, 0.001, 'main')
+    path = str(tmp_path / 'torn.journal')
+    write_journal(path, [good, good[:-3]])
+    assert len(list(read_journal(path))) == 1
+
+    corrupt = bytearray(good)
+    corrupt[-1] ^= 0xff
+    path = str(tmp_path / 'corrupt.journal')
+    write_journal(path, [good, bytes(corrupt), good])
+    assert len(list(read_journal(path))) == 1
+
+
+def test_writer_rotates_and_reads_back_in_order(tmp_path):
+    path = str(tmp_path / 'arm.journal')
+    journal = CommandJournal(path, max_bytes=400, backups=10, flush_interval=0.05)
+    for i in range(20):
+        journal.record('send_angle', (1, float(i), 50), {}, None, None, float(i), 0.001)
+    journal.close()
+    assert journal.get_stats()['rotations'] > 0
+    records = read_journals(path)
+    assert [r.args[1] for r in records] == [float(i) for i in range(20)]
+
+
+def test_close_returns_when_the_file_cannot_be_opened(tmp_path):
+    blocker = tmp_path / 'not_a_directory'
+    blocker.write_text('')
+    journal = CommandJournal(str(blocker / 'arm.journal'), queue_size=5)
+    for i in range(20):
+        journal.record('get_angles', (), {}, [0] * 6, None, float(i), 0.001)
+    started = time.monotonic()
+    journal.close(timeout=5)
+    assert time.monotonic() - started < 1
+    assert journal.get_stats()['dropped'] > 0
+
+
+def test_writer_survives_a_failed_rotation(tmp_path, monkeypatch):
+    import journal as journal_module
+    path = str(tmp_path / 'arm.journal')
+    journal = CommandJournal(path, max_bytes=300, backups=50, flush_interval=0.05)
+    replace = os.replace
+    failures = []
+
+    def failing_replace(src, dst):
+        if not failures:
+            failures.append(src)
+            raise OSError('disk full')
+        return replace(src, dst)
+
+    monkeypatch.setattr(journal_module.os, 'replace', failing_replace)
+    for i in range(20):
+        journal.record('send_angle', (1, float(i), 50), {}, None, None, float(i), 0.001)
+    journal.close(timeout=2)
+    assert not journal._thread.is_alive()
+    stats = journal.get_stats()
+    assert failures and stats['errors'] >= 1
+    assert stats['records'] + stats['errors'] == 20
+    assert len(read_journals(path)) == stats['records']
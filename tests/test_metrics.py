@@ -0,0 +1,76 @@
+import threading
+import pytest
+from metrics import InstrumentedArm, MetricsRegistry, timed_lock
+
+
+def sample_lines(text):
+    return [line for line in text.splitlines() if not line.startswith('#')]
+
+
+def test_counter_family_is_named_with_total():
+    registry = MetricsRegistry()
+    registry.counter('arm_command_errors', 'Arm method calls that raised',
+                     {'method': 'get_angles'}).inc(2)
+    text = registry.render()
+    assert '# HELP arm_command_errors_total Arm method calls that raised' in text
+    assert '# TYPE arm_command_errors_total counter' in text
+    assert 'arm_command_errors_total{method="get_angles"} 2' in text
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    histogram = registry.histogram('lat', 'Latency', buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value)
+    assert sample_lines(registry.render()) == [
+        'lat_bucket{le="0.1"} 1',
+        'lat_bucket{le="1.0"} 2',
+        'lat_bucket{le="+Inf"} 3',
+        'lat_sum 5.55',
+        'lat_count 3',
+    ]
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.gauge('g', labels={'path': 'a"b\\c\nd'}).set(1)
+    assert 'g{path="a\\"b\\\\c\\nd"} 1' in registry.render()
+
+
+def test_same_name_and_labels_return_one_metric():
+    registry = MetricsRegistry()
+    assert registry.counter('c', labels={'a': 1}) is registry.counter('c', labels={'a': '1'})
+    assert registry.counter('c', labels={'a': 1}) is not registry.counter('c', labels={'a': 2})
+
+
+class Arm:
+    def get_angles(self):
+        return [0.0] * 6
+
+    def send_angles(self, angles, speed):
+        raise IOError('serial timeout')
+
+
+def test_instrumented_arm_times_calls_and_notifies_listeners():
+    registry = MetricsRegistry()
+    calls = []
+    arm = InstrumentedArm(Arm(), registry, listeners=[lambda *call: calls.append(call)])
+    assert arm.get_angles() == [0.0] * 6
+    with pytest.raises(IOError):
+        arm.send_angles([1] * 6, 50)
+    text = registry.render()
+    assert 'arm_command_duration_seconds_count{method="get_angles"} 1' in text
+    assert 'arm_command_errors_total{method="send_angles"} 1' in text
+    assert 'arm_commands_in_flight 0' in text
+    assert [call[0] for call in calls] == ['get_angles', 'send_angles']
+    assert calls[0][3] == [0.0] * 6 and calls[0][4] is None
+    assert isinstance(calls[1][4], IOError)
+
+
+def test_timed_lock_records_waiting():
+    registry = MetricsRegistry()
+    wait = registry.histogram('wait')
+    waiters = registry.gauge('waiters')
+    with timed_lock(threading.Lock(), wait, waiters):
+        pass
+    assert wait.count == 1 and waiters.value == 0
@@ -0,0 +1,71 @@
+import time
+import pytest
+import robot_api
+from conftest import make_api_app
+from profiling import Profiling
+
+REMOTE = {'REMOTE_ADDR': '10.0.0.2'}
+
+
+@pytest.fixture
+def make_client():
+    def make(**profiling_config):
+        app = make_api_app(profiling=dict(profiling_config, enabled=True))
+        return app.test_client()
+
+    yield make
+    robot_api.arm_supervisor.stop()
+
+
+def test_loopback_needs_no_token(make_client):
+    client = make_client()
+    response = client.get('/debug/slow')
+    assert response.status_code == 200
+    assert 'threshold_ms' in response.get_json()
+    assert 'Server-Timing' in client.get('/health').headers
+
+
+def test_remote_callers_are_refused_without_a_token(make_client):
+    client = make_client()
+    assert client.get('/debug/slow', environ_base=REMOTE).status_code == 403
+    assert client.post('/debug/profile/start', environ_base=REMOTE).status_code == 403
+    # The rest of the API stays reachable
+    assert client.get('/health', environ_base=REMOTE).status_code == 200
+
+
+def test_configured_token_is_required_from_everywhere(make_client):
+    client = make_client(admin_token='s3cret')
+    assert client.get('/debug/slow').status_code == 403
+    assert client.get('/debug/slow', headers={'X-Admin-Token': 'wrong'}).status_code == 403
+    response = client.get('/debug/slow', environ_base=REMOTE,
+                          headers={'X-Admin-Token': 's3cret'})
+    assert response.status_code == 200
+
+
+def test_ipv4_mapped_loopback_is_loopback():
+    profiling = Profiling({'enabled': True})
+    assert profiling.authorized({}, '::ffff:127.0.0.1')
+    assert profiling.authorized({}, '::1')
+    assert not profiling.authorized({}, '::ffff:10.0.0.2')
+    assert not profiling.authorized({}, None)
+
+
+@pytest.mark.parametrize('interval_ms', [0, -5, 0.1, 'nan', 'fast'])
+def test_bad_interval_is_rejected(make_client, interval_ms):
+    client = make_client()
+    response = client.post('/debug/profile/start', json={'seconds': 1, 'interval_ms': interval_ms})
+    assert response.status_code == 400
+    assert not client.get('/debug/profile?status=1').get_json()['running']
+
+
+def test_profile_runs_and_returns_folded_stacks(make_client):
+    client = make_client()
+    response = client.post('/debug/profile/start', json={'seconds': 5, 'interval_ms': 1})
+    assert response.status_code == 200
+    assert client.post('/debug/profile/start', json={'seconds': 1}).status_code == 409
+    time.sleep(0.05)
+    status = client.post('/debug/profile/stop').get_json()
+    assert not status['running'] and status['samples'] > 0
+    assert status['interval_ms'] == 1
+    folded = client.get('/debug/profile').get_data(as_text=True)
+    assert folded and all(line.rsplit(' ', 1)[1].isdigit() for line in folded.splitlines())
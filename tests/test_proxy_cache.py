@@ -0,0 +1,105 @@
+import threading
+import time
+import pytest
+from proxy_cache import ResponseCache
+
+
+def test_hit_until_ttl_expires():
+    cache = ResponseCache(default_ttl=0.05)
+    calls = []
+    loader = lambda: calls.append(1) or {'success': True, 'data': len(calls)}
+    assert cache.get_or_load('/health', loader)['data'] == 1
+    assert cache.get_or_load('/health', loader)['data'] == 1
+    time.sleep(0.06)
+    assert cache.get_or_load('/health', loader)['data'] == 2
+
+
+def test_errors_are_not_cached():
+    cache = ResponseCache(default_ttl=10)
+    results = iter([{'success': False, 'error': 'HTTP 503'}, {'success': True, 'data': 1}])
+    assert not cache.get_or_load('/robot/status', lambda: next(results))['success']
+    assert cache.get_or_load('/robot/status', lambda: next(results))['success']
+
+
+def _concurrent(cache, key, loader, count=5):
+    outcomes = []
+
+    def run():
+        try:
+            outcomes.append(cache.get_or_load(key, loader))
+        except Exception as e:
+            outcomes.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join()
+    return outcomes
+
+
+def test_single_flight_shares_one_call():
+    cache = ResponseCache(default_ttl=10)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.2)
+        return {'success': True, 'data': 'pose'}
+
+    outcomes = _concurrent(cache, '/robot/status', loader)
+    assert len(calls) == 1
+    assert all(outcome == {'success': True, 'data': 'pose'} for outcome in outcomes)
+    assert cache.get_stats()['coalesced'] == 4
+
+
+def test_single_flight_error_reaches_every_waiter():
+    cache = ResponseCache(default_ttl=10)
+
+    def loader():
+        time.sleep(0.2)
+        raise ValueError('upstream broke')
+
+    outcomes = _concurrent(cache, '/robot/status', loader)
+    assert len(outcomes) == 5
+    assert all(isinstance(outcome, ValueError) for outcome in outcomes)
+    assert cache.get_stats()['in_flight'] == 0
+
+
+def test_invalidate_drops_entries_and_in_flight_results():
+    cache = ResponseCache(default_ttl=10)
+    cache.get_or_load('/health', lambda: {'success': True, 'data': 'old'})
+    cache.invalidate()
+    assert cache.get_stats()['entries'] == 0
+
+    def loader():
+        # A command lands while this GET is on the wire
+        cache.invalidate()
+        return {'success': True, 'data': 'stale'}
+
+    assert cache.get_or_load('/robot/status', loader)['data'] == 'stale'
+    assert cache.get_stats()['entries'] == 0
+
+
+def test_ttl_uses_longest_prefix():
+    cache = ResponseCache({'/robot': 1, '/robot/status': 0.5}, default_ttl=0)
+    assert cache.ttl_for('/robot/status') == 0.5
+    assert cache.ttl_for('/robot/history') == 1
+    assert cache.ttl_for('/health') == 0
+
+
+def test_async_single_flight_error_reaches_waiters():
+    import asyncio
+    cache = ResponseCache(default_ttl=10)
+
+    async def loader():
+        await asyncio.sleep(0.05)
+        raise ValueError('upstream broke')
+
+    async def main():
+        return await asyncio.gather(*[cache.get_or_load_async('/health', loader)
+                                      for _ in range(3)], return_exceptions=True)
+
+    outcomes = asyncio.run(main())
+    assert all(isinstance(outcome, ValueError) for outcome in outcomes)
@@ -0,0 +1,73 @@
+import threading
+import time
+import pytest
+from sim_arm import JOINT_LIMITS, SimulatedMechArm270, SimulatedSerialError
+
+
+def fast_arm(**kwargs):
+    options = dict(latency_ms=0, jitter_ms=0, max_joint_speed=1000, seed=1)
+    options.update(kwargs)
+    return SimulatedMechArm270(**options)
+
+
+def timed(call):
+    started = time.perf_counter()
+    call()
+    return time.perf_counter() - started
+
+
+def test_writes_pay_latency():
+    arm = SimulatedMechArm270(latency_ms=20, jitter_ms=0, seed=1)
+    assert timed(lambda: arm.send_angles([0] * 6, 50)) >= 0.018
+    assert timed(lambda: arm.set_gripper_value(10, 50)) >= 0.018
+    assert timed(arm.get_angles) >= 0.018
+
+
+def test_commands_serialize_on_the_port():
+    arm = SimulatedMechArm270(latency_ms=20, jitter_ms=0, seed=1)
+    threads = [threading.Thread(target=arm.send_angle, args=(1, 10, 50)) for _ in range(5)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert time.perf_counter() - started >= 5 * 0.018
+
+
+def test_motion_reaches_target_over_time():
+    arm = fast_arm(max_joint_speed=200)
+    arm.send_angles([20, 0, 0, 0, 0, 0], 100)
+    assert arm.is_moving() == 1
+    assert 0 < arm.get_angles()[0] < 20
+    time.sleep(0.12)
+    assert arm.get_angles()[0] == 20.0
+    assert arm.is_moving() == 0
+
+
+def test_angles_are_clamped_to_joint_limits():
+    arm = fast_arm()
+    arm.send_angles([500, -500, 0, 0, 0, 0], 100)
+    time.sleep(0.6)
+    angles = arm.get_angles()
+    assert angles[0] == JOINT_LIMITS[0][1]
+    assert angles[1] == JOINT_LIMITS[1][0]
+
+
+def test_stop_freezes_motion():
+    arm = fast_arm(max_joint_speed=50)
+    arm.send_angle(1, 100, 100)
+    time.sleep(0.05)
+    arm.stop()
+    stopped = arm.get_angles()[0]
+    time.sleep(0.05)
+    assert arm.get_angles()[0] == stopped < 100
+
+
+def test_disconnect_and_error_rate():
+    arm = fast_arm(error_rate=1.0)
+    with pytest.raises(SimulatedSerialError):
+        arm.get_coords()
+    arm = fast_arm()
+    arm.disconnect()
+    with pytest.raises(SimulatedSerialError):
+        arm.send_coords([0] * 6, 50)
@@ -0,0 +1,36 @@
+import os
+import subprocess
+import sys
+import zlib
+import numpy as np
+from sim_camera import SimulatedCamera
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def frame_crc(hash_seed):
+    # Each process gets its own PYTHONHASHSEED, as separate benchmark runs do
+    code = ("import zlib; from sim_camera import SimulatedCamera; "
+            "print(zlib.crc32(SimulatedCamera(2, 64, 48, fps=0).read()[1].tobytes()))")
+    env = dict(os.environ, PYTHONHASHSEED=str(hash_seed))
+    return subprocess.check_output([sys.executable, '-c', code], cwd=ROOT, env=env).strip()
+
+
+def test_frames_are_stable_across_processes():
+    assert frame_crc(1) == frame_crc(2)
+
+
+def test_frames_scroll_and_differ_per_camera():
+    camera = SimulatedCamera(0, 64, 48, fps=0)
+    ok, first = camera.read()
+    ok, second = camera.read()
+    assert ok and first.shape == (48, 64, 3) and first.dtype == np.uint8
+    assert not np.array_equal(first, second)
+    assert not np.array_equal(SimulatedCamera(4, 64, 48, fps=0).read()[1], first)
+
+
+def test_released_camera_stops_reading():
+    camera = SimulatedCamera(0, 16, 16, fps=0)
+    camera.release()
+    assert not camera.isOpened()
+    assert camera.read() == (False, None)
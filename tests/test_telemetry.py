@@ -0,0 +1,50 @@
+import numpy as np
+from telemetry import TelemetryRing
+
+
+def fill(ring, count, start=1000.0):
+    for i in range(count):
+        ring.record([i] * 6, [i] * 6, i, i, 0, timestamp=start + i)
+
+
+def test_query_wraps_in_time_order():
+    ring = TelemetryRing(capacity=5)
+    fill(ring, 8)
+    samples = ring.query()
+    assert len(ring) == 5
+    assert samples['timestamp'].tolist() == [1003.0, 1004.0, 1005.0, 1006.0, 1007.0]
+    assert ring.query(1004.5, 1006.0)['timestamp'].tolist() == [1005.0, 1006.0]
+
+
+def test_downsample_buckets():
+    ring = TelemetryRing(capacity=100)
+    fill(ring, 10)
+    result = TelemetryRing.downsample(ring.query(), 2)
+    assert result['count'].tolist() == [5, 5]
+    assert result['gripper_min'].tolist() == [0.0, 5.0]
+    assert result['gripper_max'].tolist() == [4.0, 9.0]
+    assert result['gripper_mean'].tolist() == [2.0, 7.0]
+    assert result['angles_mean'].shape == (2, 6)
+
+
+def test_downsample_ignores_missing_values():
+    ring = TelemetryRing(capacity=10)
+    ring.record([1] * 6, [1] * 6, 10, None, 0, timestamp=1.0)
+    ring.record([1] * 6, [1] * 6, None, None, 0, timestamp=2.0)
+    result = TelemetryRing.downsample(ring.query(), 1)
+    assert result['gripper_mean'].tolist() == [10.0]
+    assert np.isnan(result['torque_mean'][0])
+
+
+def test_downsample_empty():
+    result = TelemetryRing.downsample(TelemetryRing(capacity=4).query(), 10)
+    assert len(result['timestamp']) == 0
+
+
+def test_binary_round_trip():
+    ring = TelemetryRing(capacity=10)
+    fill(ring, 3)
+    body, descr = TelemetryRing.to_binary(ring.query())
+    records = np.frombuffer(body, dtype=np.dtype([tuple(field) for field in descr]))
+    assert records['timestamp'].tolist() == [1000.0, 1001.0, 1002.0]
+    assert records['angles'][2].tolist() == [2.0] * 6
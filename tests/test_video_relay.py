@@ -0,0 +1,82 @@
+import time
+from video_relay import CameraRelay, VideoRelay, parse_mjpeg, mjpeg_part
+
+
+def test_parts_split_across_chunks():
+    stream = mjpeg_part(b'\xff\xd8one\xff\xd9') + mjpeg_part(b'\xff\xd8two\r\n--frame\xff\xd9')
+    chunks = [stream[i:i + 7] for i in range(0, len(stream), 7)]
+    parts = list(parse_mjpeg(chunks))
+    # Content-Length lets a payload contain the boundary itself
+    assert parts == [('image/jpeg', b'\xff\xd8one\xff\xd9'),
+                     ('image/jpeg', b'\xff\xd8two\r\n--frame\xff\xd9')]
+
+
+def test_parts_without_content_length():
+    stream = (b'--frame\r\nContent-Type: text/plain\r\n\r\nCamera 4 not available\r\n'
+              b'--frame\r\nContent-Type: image/jpeg\r\n\r\nJPEG\r\n--frame')
+    assert list(parse_mjpeg([stream])) == [('text/plain', b'Camera 4 not available'),
+                                           ('image/jpeg', b'JPEG')]
+
+
+def test_leading_garbage_is_skipped():
+    assert list(parse_mjpeg([b'junk' * 10, mjpeg_part(b'X')])) == [('image/jpeg', b'X')]
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, frames):
+        self.frames = frames
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def iter_content(self, size):
+        for frame in self.frames:
+            time.sleep(0.01)
+            yield mjpeg_part(frame)
+
+
+class FakeSession:
+    def __init__(self):
+        self.urls = []
+
+    def get(self, url, **kwargs):
+        self.urls.append(url)
+        return FakeResponse([b'A', b'B', b'C'])
+
+
+def test_relay_shares_one_upstream_and_restarts_after_idle():
+    session = FakeSession()
+    relay = CameraRelay(0, 'http://robot/video/stream/0', session, idle_timeout=0.05,
+                        reconnect_delay=0.01)
+    seq, frame = relay.wait_frame(0, 1.0)
+    assert frame == b'A'
+    assert relay.wait_frame(seq, 1.0)[1] == b'B'
+    # No viewers: the reader stops on its own
+    deadline = time.monotonic() + 2
+    while relay.get_stats()['upstream_active'] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not relay.get_stats()['upstream_active']
+    connects = relay.upstream_connects
+    seq, frame = relay.wait_frame(relay.seq, 1.0)
+    assert frame is not None
+    assert relay.upstream_connects == connects + 1
+
+
+def test_unknown_cameras_get_no_relay():
+    relay = VideoRelay('http://robot', {}, [0, 2])
+    assert relay.camera('7') is None
+    assert list(relay.stream('7')) == []
+    assert relay.camera('2') is relay.camera(2)
+    assert relay.get_stats().keys() == {'2'}
+
+
+def test_viewer_rate_limit():
+    relay = VideoRelay('http://robot', {'max_fps': 10}, [0])
+    assert relay.allow('10.0.0.1', '0') == 0
+    assert 0 < relay.allow('10.0.0.1', '0') <= 0.1
+    assert relay.allow('10.0.0.2', '0') == 0
@@ -0,0 +1,310 @@
+from flask import Blueprint, Response, jsonify
+import cv2
+import threading
+import atexit
+import os
+from metrics import timed_lock
+from profiling import span
+from frame_ring import FrameRingReader, ring_name
+
+video = Blueprint('video', __name__)
+
+# Thread-safe camera management
+camera_lock = threading.Lock()
+active_cameras = {}
+
+# Set up by init_video()
+metrics = None
+camera_lock_wait = None
+camera_lock_waiters = None
+camera_config = []
+video_config = {}
+shared_frames = False
+publishers = []
+
+# Seconds without a new frame before a shared-memory ring is re-attached
+SHARED_FRAME_TIMEOUT = 2.0
+
+def init_video(config, registry, shared=False):
+    """Set up the video blueprint; returns it
+
+    With shared=True, frames come from the device owner's shared-memory
+    rings instead of cameras opened in this process. video.export_frames
+    makes this process capture continuously into such rings itself (see
+    start_capture), so local vision consumers can subscribe to raw frames.
+    Configured vision processors read the same rings and turn it on too.
+    """
+    global metrics, camera_lock_wait, camera_lock_waiters, camera_config, video_config
+    global shared_frames
+    metrics = registry
+    camera_config = config.get('cameras', [])
+    video_config = config.get('video', {})
+    shared_frames = shared
+    export = video_config.get('export_frames', False) or config.get('vision', {}).get('processors')
+    if not shared and export:
+        from device_owner import CameraPublisher
+        slots = video_config.get('ring_slots', 4)
+        publishers[:] = [
+            CameraPublisher(camera['id'], lambda camera_id: create_capture(camera_id, video_config),
+                            slots)
+            for camera in camera_config]
+        shared_frames = True
+    camera_lock_wait = metrics.histogram(
+        'camera_lock_wait_seconds', 'Time spent waiting to acquire camera_lock')
+    camera_lock_waiters = metrics.gauge(
+        'camera_lock_waiters', 'Threads currently queued on camera_lock')
+    return video
+
+def create_capture(camera_id, video_config):
+    """Open the camera backend selected in config.yaml"""
+    if video_config.get('backend', 'hardware') == 'simulated':
+        from sim_camera import SimulatedCamera
+        return SimulatedCamera(camera_id, **video_config.get('simulator', {}))
+    return cv2.VideoCapture(camera_id)
+
+def start_capture():
+    """Start exporting frames to shared memory when video.export_frames is set"""
+    for publisher in publishers:
+        publisher.start()
+    if publishers:
+        atexit.register(stop_capture)
+
+def stop_capture():
+    """Stop exporting frames and remove the shared-memory rings"""
+    for publisher in publishers:
+        publisher.close()
+
+def video_health():
+    """Video fields of the /health response"""
+    return {
+        "cameras_open": sorted(str(camera_id) for camera_id in active_cameras)
+    }
+
+VIDEO_DOCS = {
+    "GET /video/stream/<camera_id>": "Stream video from camera (MJPEG)",
+    "GET /video/frame/<camera_id>": "Get single frame from camera (JPEG)",
+    "GET /video/cameras": "List available cameras",
+    "GET /video/rings": "Shared-memory frame rings for local subscribers (name, shape, dtype, seq)"
+}
+
+class LocalCamera:
+    """Camera opened in this process; reads are serialized on camera_lock"""
+
+    stale = False
+
+    def __init__(self, cap):
+        self.cap = cap
+        self.seq = 0
+
+    def next_frame(self, after_seq):
+        with timed_lock(camera_lock, camera_lock_wait, camera_lock_waiters):
+            success, frame = self.cap.read()
+            if not success:
+                return self.seq, None
+            self.seq += 1
+            return self.seq, frame
+
+    def still_valid(self, seq):
+        return True
+
+class SharedCamera:
+    """Camera owned by another process, read zero-copy from its frame ring"""
+
+    def __init__(self, reader):
+        self.reader = reader
+        self.stale = False
+
+    def next_frame(self, after_seq):
+        frame = self.reader.wait_next(after_seq, SHARED_FRAME_TIMEOUT)
+        if frame is None:
+            # The owner may have restarted and recreated the ring; re-attach next time
+            self.stale = True
+            return after_seq, None
+        return frame.seq, frame.data
+
+    def still_valid(self, seq):
+        return self.reader.valid(seq)
+
+def get_camera_stream(camera_id):
+    """Get or create a camera stream for the given camera_id"""
+    with timed_lock(camera_lock, camera_lock_wait, camera_lock_waiters):
+        camera = active_cameras.get(camera_id)
+        if camera is None or camera.stale:
+            try:
+                if shared_frames:
+                    reader = FrameRingReader.open(ring_name(camera_id))
+                    if reader is None:
+                        return None
+                    camera = SharedCamera(reader)
+                else:
+                    cap = create_capture(camera_id, video_config)
+                    if not cap.isOpened():
+                        return None
+                    camera = LocalCamera(cap)
+                active_cameras[camera_id] = camera
+            except Exception as e:
+                print(f"Error opening camera {camera_id}: {e}")
+                return None
+        return camera
+
+def read_frame(camera, camera_id, after_seq=0):
+    """Read the next frame from a camera, recording read time; returns (seq, frame)"""
+    labels = {'camera': camera_id}
+    with metrics.histogram('camera_read_seconds', 'Time to obtain a frame', labels).time(), \
+            span('device_read'):
+        seq, frame = camera.next_frame(after_seq)
+    if frame is None:
+        metrics.counter('camera_errors', 'Failed camera reads and encodes',
+                        dict(labels, stage='read')).inc()
+    return seq, frame
+
+def encode_frame(frame, camera_id):
+    """JPEG-encode a frame, recording encode time"""
+    labels = {'camera': camera_id}
+    with metrics.histogram('camera_encode_seconds', 'Duration of JPEG encoding', labels).time(), \
+            span('encode'):
+        ret, buffer = cv2.imencode('.jpg', frame)
+    if not ret:
+        metrics.counter('camera_errors', 'Failed camera reads and encodes',
+                        dict(labels, stage='encode')).inc()
+    return ret, buffer
+
+def capture_jpeg(camera, camera_id, after_seq=0, attempts=3, overlay=None):
+    """Read and encode the next frame; returns (seq, jpeg bytes, error)
+
+    overlay, if given, is called with the frame and returns the image to
+    encode in its place (drawing on a copy; shared frames are read-only).
+    """
+    seq = after_seq
+    for _ in range(attempts):
+        seq, frame = read_frame(camera, camera_id, after_seq)
+        if frame is None:
+            return seq, None, "Failed to capture frame"
+        if overlay is not None:
+            frame = overlay(frame)
+        ret, buffer = encode_frame(frame, camera_id)
+        if not ret:
+            return seq, None, "Failed to encode frame"
+        # Shared frames are encoded in place; retry if the writer lapped us meanwhile
+        if camera.still_valid(seq):
+            return seq, buffer.tobytes(), None
+        metrics.counter('camera_frames_overwritten',
+                        'Shared-memory frames overwritten while being encoded',
+                        {'camera': camera_id}).inc()
+    return seq, None, "Frame overwritten while encoding"
+
+def generate_frames(camera_id, overlay=None):
+    """Generate video frames from camera"""
+    camera = get_camera_stream(camera_id)
+    if not camera:
+        yield (b'--frame\r\n'
+               b'Content-Type: image/jpeg\r\n\r\n'
+               b'Error: Camera not available\r\n')
+        return
+
+    streams = metrics.gauge('mjpeg_streams_active', 'Open MJPEG stream responses',
+                            {'camera': camera_id})
+    streams.inc()
+    seq = 0
+    try:
+        while True:
+            try:
+                seq, frame_bytes, error = capture_jpeg(camera, camera_id, seq, overlay=overlay)
+                if error:
+                    break
+
+                yield (b'--frame\r\n'
+                       b'Content-Type: image/jpeg\r\n'
+                       b'Content-Length: ' + str(len(frame_bytes)).encode() + b'\r\n\r\n'
+                       + frame_bytes + b'\r\n')
+            except Exception as e:
+                print(f"Error generating frame: {e}")
+                break
+    finally:
+        streams.dec()
+
+# Video Streaming API Endpoints
+
+@video.route('/video/stream/<camera_id>')
+def video_stream(camera_id):
+    """Stream video from specified camera"""
+    try:
+        # Handle both integer and string camera IDs
+        cam_id = int(camera_id) if camera_id.isdigit() else camera_id
+        return Response(generate_frames(cam_id), 
+                       mimetype='multipart/x-mixed-replace; boundary=frame')
+    except ValueError:
+        return jsonify({"error": "Invalid camera ID"}), 400
+
+@video.route('/video/frame/<camera_id>')
+def video_frame(camera_id):
+    """Get single frame from specified camera"""
+    try:
+        cam_id = int(camera_id) if camera_id.isdigit() else camera_id
+        camera = get_camera_stream(cam_id)
+        
+        if not camera:
+            return jsonify({"error": "Camera not available"}), 404
+            
+        seq, frame_bytes, error = capture_jpeg(camera, cam_id)
+        if error:
+            return jsonify({"error": error}), 500
+            
+        return Response(frame_bytes, mimetype='image/jpeg')
+    except ValueError:
+        return jsonify({"error": "Invalid camera ID"}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@video.route('/video/cameras', methods=['GET'])
+def list_cameras():
+    """List available cameras"""
+    if shared_frames:
+        # Cameras belong to the device owner; report the ones it is publishing
+        return jsonify({"cameras": [camera['id'] for camera in camera_config
+                                    if get_camera_stream(camera['id']) is not None]})
+    if video_config.get('backend', 'hardware') == 'simulated':
+        return jsonify({"cameras": [camera['id'] for camera in camera_config]})
+
+    available_cameras = []
+    
+    # Check common camera indices
+    for i in range(5):
+        try:
+            cap = cv2.VideoCapture(i)
+            if cap.isOpened():
+                available_cameras.append(i)
+            cap.release()
+        except Exception:
+            continue
+    
+    # Check common device paths
+    device_paths = ['/dev/video0', '/dev/video1', '/dev/video2', '/dev/video3', '/dev/video4']
+    for path in device_paths:
+        if os.path.exists(path):
+            available_cameras.append(path)
+    
+    return jsonify({"cameras": available_cameras})
+
+@video.route('/video/rings', methods=['GET'])
+def list_rings():
+    """Describe the shared-memory frame rings local processes can subscribe to"""
+    if not shared_frames:
+        return jsonify({"error": "Frames are not exported; set video.export_frames or api.workers"}), 404
+    rings = []
+    for camera in camera_config:
+        reader = FrameRingReader.open(ring_name(camera['id']))
+        if reader is None:
+            continue
+        try:
+            rings.append({
+                "camera": camera['id'],
+                "name": reader.name,
+                "shape": list(reader.shape),
+                "dtype": reader.dtype.str,
+                "slots": reader.slots,
+                "seq": reader.latest_seq()
+            })
+        finally:
+            reader.close()
+    return jsonify({"rings": rings})
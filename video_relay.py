@@ -0,0 +1,223 @@
+import threading
+import time
+import requests
+
+BOUNDARY = b'--frame'
+
+
+def parse_mjpeg(chunks):
+    """Yield (content_type, payload) for each part of a multipart/x-mixed-replace stream"""
+    buf = b''
+    for chunk in chunks:
+        buf += chunk
+        while True:
+            start = buf.find(BOUNDARY)
+            if start < 0:
+                buf = buf[-len(BOUNDARY):]
+                break
+            header_end = buf.find(b'\r\n\r\n', start)
+            if header_end < 0:
+                break
+            headers = {}
+            for line in buf[start + len(BOUNDARY):header_end].split(b'\r\n'):
+                name, sep, value = line.partition(b':')
+                if sep:
+                    headers[name.strip().lower()] = value.strip()
+            body_start = header_end + 4
+            length = headers.get(b'content-length')
+            if length is not None:
+                body_end = body_start + int(length)
+                if len(buf) < body_end:
+                    break
+            else:
+                body_end = buf.find(b'\r\n' + BOUNDARY, body_start)
+                if body_end < 0:
+                    break
+            yield headers.get(b'content-type', b'').decode(), buf[body_start:body_end]
+            buf = buf[body_end:]
+
+
+def mjpeg_part(frame):
+    """Wrap one JPEG as a multipart/x-mixed-replace part"""
+    return (b'--frame\r\n'
+            b'Content-Type: image/jpeg\r\n'
+            b'Content-Length: ' + str(len(frame)).encode() + b'\r\n\r\n' + frame + b'\r\n')
+
+
+class CameraRelay:
+    """One upstream MJPEG stream for a camera, fanned out as the latest frame
+
+    The upstream connection is opened on first use and dropped after
+    idle_timeout seconds without viewers, so the robot host serves at most
+    one stream per camera regardless of how many browsers are watching.
+    """
+
+    def __init__(self, camera_id, stream_url, session, idle_timeout=30.0,
+                 reconnect_delay=1.0):
+        self.camera_id = camera_id
+        self.stream_url = stream_url
+        self.session = session
+        self.idle_timeout = idle_timeout
+        self.reconnect_delay = reconnect_delay
+
+        self.frame = None
+        self.seq = 0
+        self.timestamp = 0.0
+        self.error = None
+        self.upstream_connects = 0
+        self.last_access = time.monotonic()
+
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def touch(self):
+        """Mark the relay as in use, starting the upstream reader if needed"""
+        with self._cond:
+            self.last_access = time.monotonic()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run,
+                                                name=f'relay-{self.camera_id}')
+                self._thread.daemon = True
+                self._thread.start()
+
+    def latest(self):
+        """Return (seq, jpeg bytes) of the newest frame, or (0, None)"""
+        self.touch()
+        return self.seq, self.frame
+
+    def wait_frame(self, after_seq, timeout):
+        """Block until a frame newer than after_seq arrives; returns (seq, frame)"""
+        self.touch()
+        with self._cond:
+            self._cond.wait_for(lambda: self.seq != after_seq, timeout)
+            return self.seq, self.frame
+
+    def _idle(self):
+        return time.monotonic() - self.last_access > self.idle_timeout
+
+    def _exit_if_idle(self):
+        """Decide to stop under the lock touch() holds, so no viewer is left without a reader"""
+        with self._cond:
+            if self._idle():
+                self._thread = None
+                return True
+            return False
+
+    def _publish(self, frame):
+        with self._cond:
+            self.frame = frame
+            self.seq += 1
+            self.timestamp = time.time()
+            self._cond.notify_all()
+
+    def _run(self):
+        try:
+            while not self._exit_if_idle():
+                try:
+                    self.upstream_connects += 1
+                    with self.session.get(self.stream_url, stream=True,
+                                          timeout=(3.05, 10)) as response:
+                        if response.status_code != 200:
+                            raise IOError(f'HTTP {response.status_code}')
+                        for content_type, payload in parse_mjpeg(response.iter_content(65536)):
+                            if content_type != 'image/jpeg':
+                                raise IOError(payload.decode(errors='replace').strip())
+                            self.error = None
+                            self._publish(payload)
+                            if self._idle():
+                                break
+                        else:
+                            raise IOError('Upstream stream ended')
+                except (requests.exceptions.RequestException, IOError) as e:
+                    self.error = str(e)
+                    print(f"Video relay error on camera {self.camera_id}: {e}")
+                    time.sleep(self.reconnect_delay)
+        finally:
+            with self._cond:
+                # Only if the thread died on an unexpected error; after an idle
+                # exit a viewer may already have started a new reader
+                if self._thread is threading.current_thread():
+                    self._thread = None
+
+    def get_stats(self):
+        return {
+            'seq': self.seq,
+            'frame_bytes': len(self.frame) if self.frame else 0,
+            'age': round(time.time() - self.timestamp, 3) if self.timestamp else None,
+            'upstream_active': self._thread is not None,
+            'upstream_connects': self.upstream_connects,
+            'error': self.error
+        }
+
+
+class VideoRelay:
+    """Camera relays keyed by camera id plus per-viewer rate limiting
+
+    With camera_ids, only those cameras are relayed; others get no relay
+    or upstream connection.
+    """
+
+    def __init__(self, api_base, relay_config, camera_ids=None):
+        self.api_base = api_base
+        self.camera_ids = {str(camera_id) for camera_id in camera_ids} if camera_ids is not None else None
+        self.max_fps = relay_config.get('max_fps', 10)
+        self.idle_timeout = relay_config.get('idle_timeout', 30.0)
+        self.reconnect_delay = relay_config.get('reconnect_delay', 1.0)
+        self.session = requests.Session()
+        self._lock = threading.Lock()
+        self._cameras = {}
+        self._last_served = {}
+
+    @property
+    def min_interval(self):
+        return 1.0 / self.max_fps if self.max_fps else 0.0
+
+    def camera(self, camera_id):
+        """The relay for a camera, or None if it is not a configured camera"""
+        # URLs give ids as strings; one relay per camera whichever form is used
+        camera_id = str(camera_id)
+        if self.camera_ids is not None and camera_id not in self.camera_ids:
+            return None
+        with self._lock:
+            relay = self._cameras.get(camera_id)
+            if relay is None:
+                relay = self._cameras[camera_id] = CameraRelay(
+                    camera_id, f"{self.api_base}/video/stream/{camera_id}",
+                    self.session, self.idle_timeout, self.reconnect_delay)
+            return relay
+
+    def allow(self, viewer, camera_id):
+        """Per-viewer single-frame rate limit; returns seconds to wait, 0 if allowed"""
+        now = time.monotonic()
+        key = (viewer, camera_id)
+        with self._lock:
+            wait = self._last_served.get(key, 0.0) + self.min_interval - now
+            if wait > 0:
+                return wait
+            self._last_served[key] = now
+            if len(self._last_served) > 4096:
+                cutoff = now - 60
+                self._last_served = {k: t for k, t in self._last_served.items() if t > cutoff}
+            return 0
+
+    def stream(self, camera_id, timeout=10.0):
+        """Yield multipart MJPEG parts for one viewer, capped at max_fps"""
+        relay = self.camera(camera_id)
+        if relay is None:
+            return
+        seq = 0
+        next_due = 0.0
+        while True:
+            delay = next_due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            seq, frame = relay.wait_frame(seq, timeout)
+            if frame is None:
+                return
+            next_due = time.monotonic() + self.min_interval
+            yield mjpeg_part(frame)
+
+    def get_stats(self):
+        with self._lock:
+            cameras = dict(self._cameras)
+        return {str(camera_id): relay.get_stats() for camera_id, relay in cameras.items()}
@@ -0,0 +1,262 @@
+import importlib
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from frame_ring import FrameRingReader, FrameSubscriber
+
+# Frame processors by name. A processor takes a BGR frame (a private copy)
+# and returns a JSON-serializable dict; detections listed under
+# "detections" as {"label", "points": [[x, y], ...]} are drawn by overlays.
+PROCESSORS = {}
+
+
+def processor(name):
+    """Register a frame processor under a name usable in config.yaml"""
+    def register(fn):
+        PROCESSORS[name] = fn
+        return fn
+    return register
+
+
+def load_processor(name):
+    """A registered processor, or one given as 'module:function'"""
+    if name in PROCESSORS:
+        return PROCESSORS[name]
+    module, sep, function = name.partition(':')
+    if not sep:
+        raise ValueError(f"Unknown vision processor: {name}")
+    return getattr(importlib.import_module(module), function)
+
+
+# Detectors are built once per pool process
+_detectors = {}
+
+
+@processor('aruco')
+def detect_aruco(frame):
+    """ArUco markers from the 4x4_50 dictionary"""
+    import cv2
+    detector = _detectors.get('aruco')
+    if detector is None:
+        dictionary = cv2.aruco.getPredefinedDictionary(cv2.aruco.DICT_4X4_50)
+        if hasattr(cv2.aruco, 'ArucoDetector'):
+            detector = cv2.aruco.ArucoDetector(dictionary).detectMarkers
+        else:
+            # OpenCV < 4.7
+            detector = partial(cv2.aruco.detectMarkers, dictionary=dictionary)
+        _detectors['aruco'] = detector
+    corners, ids, _ = detector(frame)
+    detections = []
+    if ids is not None:
+        for marker_id, points in zip(ids.flatten(), corners):
+            detections.append({"label": f"aruco {int(marker_id)}", "id": int(marker_id),
+                               "points": points.reshape(-1, 2).round(1).tolist()})
+    return {"detections": detections}
+
+
+@processor('qr')
+def detect_qr(frame):
+    """QR codes with their decoded text"""
+    import cv2
+    detector = _detectors.get('qr')
+    if detector is None:
+        detector = _detectors['qr'] = cv2.QRCodeDetector()
+    found, texts, points, _ = detector.detectAndDecodeMulti(frame)
+    detections = []
+    if found:
+        for text, corners in zip(texts, points):
+            detections.append({"label": text or "qr", "text": text,
+                               "points": corners.reshape(-1, 2).round(1).tolist()})
+    return {"detections": detections}
+
+
+# Pool side: each worker process attaches to the frame rings itself, so
+# frames never travel through the task queue
+
+_readers = {}
+
+
+def _copy_frame(ring, seq):
+    """Private copy of frame seq from a ring, or None if it was overwritten"""
+    for _ in range(2):
+        reader = _readers.get(ring)
+        if reader is None:
+            reader = FrameRingReader.open(ring)
+            if reader is None:
+                return None
+            _readers[ring] = reader
+        frame = reader.get(seq)
+        if frame is not None:
+            data = frame.data.copy()
+            return data if reader.valid(seq) else None
+        if reader.latest_seq() >= seq:
+            # Lapped by the writer before this task started
+            return None
+        # Older than the requested frame: the ring was recreated, so re-attach
+        reader.close()
+        del _readers[ring]
+    return None
+
+
+def _process(name, ring, seq):
+    """Pool task: run one processor on frame seq; returns (result, seconds) or None"""
+    frame = _copy_frame(ring, seq)
+    if frame is None:
+        return None
+    started = time.perf_counter()
+    result = load_processor(name)(frame)
+    return result, time.perf_counter() - started
+
+
+def draw_detections(frame, results):
+    """Copy of frame with the detections in a results() reply drawn on it"""
+    import cv2
+    import numpy as np
+    canvas = frame.copy()
+    for name, entry in results.get('processors', {}).items():
+        for detection in (entry.get('result') or {}).get('detections', []):
+            points = np.array(detection.get('points', []), dtype=np.int32)
+            if not len(points):
+                continue
+            cv2.polylines(canvas, [points.reshape(-1, 1, 2)], True, (0, 255, 0), 2)
+            x, y = points.min(axis=0)
+            cv2.putText(canvas, str(detection.get('label', name)), (int(x), max(int(y) - 6, 12)),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1, cv2.LINE_AA)
+    return canvas
+
+
+class VisionStage:
+    """Runs frame processors on a process pool, off the capture and streaming paths
+
+    One scheduler thread per camera follows its frame ring and hands the
+    newest frame to each of that camera's processors. A processor still
+    busy with an earlier frame skips the new one, so perception runs at its
+    own rate and never queues up behind capture. Results are kept for the
+    last `history` frames of each camera, keyed by frame sequence.
+    """
+
+    def __init__(self, processors, workers=2, history=32, registry=None):
+        # processors maps camera id -> processor names
+        self.processors = {str(camera): list(names) for camera, names in processors.items()}
+        for names in self.processors.values():
+            for name in names:
+                load_processor(name)
+        self.workers = workers
+        self.history = history
+        self.registry = registry
+        self.pool = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._threads = []
+        self._results = {camera: OrderedDict() for camera in self.processors}
+        self._latest = {camera: {} for camera in self.processors}
+        self.stats = {camera: {name: {'submitted': 0, 'completed': 0, 'skipped_busy': 0,
+                                      'overwritten': 0, 'errors': 0} for name in names}
+                      for camera, names in self.processors.items()}
+
+    def start(self):
+        if self._threads or not self.processors:
+            return
+        self._new_pool()
+        for camera in self.processors:
+            thread = threading.Thread(target=self._schedule, args=(camera,),
+                                      name=f'vision-{camera}')
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._stopped.set()
+        if self.pool is not None:
+            # Waiting lets the pool retire its workers before multiprocessing's
+            # exit handler joins them; at most one task per processor is queued
+            self.pool.shutdown(wait=True)
+
+    def _new_pool(self):
+        # Spawned rather than forked: the server process is full of threads
+        self.pool = ProcessPoolExecutor(self.workers,
+                                        mp_context=multiprocessing.get_context('spawn'))
+
+    def _camera_id(self, camera):
+        return int(camera) if camera.isdigit() else camera
+
+    def _schedule(self, camera):
+        subscriber = FrameSubscriber(self._camera_id(camera))
+        running = {}
+        while not self._stopped.is_set():
+            frame = subscriber.next(timeout=1.0)
+            if frame is None:
+                continue
+            for name in self.processors[camera]:
+                stats = self.stats[camera][name]
+                future = running.get(name)
+                if future is not None and not future.done():
+                    stats['skipped_busy'] += 1
+                    continue
+                pool = self.pool
+                try:
+                    future = pool.submit(_process, name, subscriber.name, frame.seq)
+                except BrokenProcessPool:
+                    # A processor crashed its worker; start over with a fresh pool
+                    with self._lock:
+                        if self.pool is pool:
+                            self._new_pool()
+                    continue
+                except RuntimeError:
+                    # Pool shut down by stop()
+                    return
+                stats['submitted'] += 1
+                future.add_done_callback(
+                    partial(self._store, camera, name, frame.seq, frame.timestamp))
+                running[name] = future
+
+    def _store(self, camera, name, seq, timestamp, future):
+        stats = self.stats[camera][name]
+        try:
+            outcome = future.result()
+        except Exception as e:
+            stats['errors'] += 1
+            entry = {"error": f"{type(e).__name__}: {e}"}
+        else:
+            if outcome is None:
+                stats['overwritten'] += 1
+                return
+            result, seconds = outcome
+            stats['completed'] += 1
+            entry = {"result": result, "latency_ms": round(seconds * 1000, 3)}
+            if self.registry is not None:
+                self.registry.histogram('vision_processor_seconds', 'Time to process one frame',
+                                        {'camera': camera, 'processor': name}).observe(seconds)
+        entry["completed_at"] = time.time()
+        with self._lock:
+            frames = self._results[camera]
+            record = frames.get(seq)
+            if record is None:
+                record = frames[seq] = {"seq": seq, "timestamp": timestamp, "processors": {}}
+                while len(frames) > self.history:
+                    frames.popitem(last=False)
+            record["processors"][name] = entry
+            self._latest[camera][name] = dict(entry, seq=seq, timestamp=timestamp)
+
+    def results(self, camera_id, seq=None):
+        """Newest result of each processor, or every result for frame seq
+
+        Returns None for unknown cameras and for frames no longer cached.
+        """
+        camera = str(camera_id)
+        with self._lock:
+            if camera not in self._results:
+                return None
+            if seq is None:
+                return {"camera": camera_id, "processors": dict(self._latest[camera])}
+            record = self._results[camera].get(seq)
+            return dict(record, camera=camera_id) if record is not None else None
+
+    def status(self):
+        return {"workers": self.workers,
+                "cameras": {camera: {name: dict(stats) for name, stats in names.items()}
+                            for camera, names in self.stats.items()}}
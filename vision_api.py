@@ -0,0 +1,85 @@
+from flask import Blueprint, Response, request, jsonify
+import atexit
+from vision import VisionStage, draw_detections
+
+vision = Blueprint('vision', __name__)
+
+# Set up by init_vision()
+stage = None
+
+def create_stage(config, registry):
+    """Build the vision stage from the vision section of config.yaml"""
+    vision_config = config.get('vision', {})
+    return VisionStage(vision_config.get('processors') or {},
+                       workers=vision_config.get('workers', 2),
+                       history=vision_config.get('history', 32),
+                       registry=registry)
+
+def init_vision(config, registry, device_client=None):
+    """Set up the vision stage; returns the blueprint
+
+    With a device_client the stage runs in the device owner process and
+    results are fetched from it.
+    """
+    global stage
+    if device_client is not None:
+        from device_owner import RemoteObject
+        stage = RemoteObject(device_client, 'vision')
+    else:
+        stage = create_stage(config, registry)
+    return vision
+
+def start_vision():
+    """Start the processor pool and per-camera schedulers"""
+    stage.start()
+    atexit.register(stage.stop)
+
+def vision_health():
+    """Vision fields of the /health response"""
+    try:
+        return {"vision": stage.status()}
+    except Exception as e:
+        return {"vision": {"error": str(e)}}
+
+VISION_DOCS = {
+    "GET /vision/<camera_id>": "Newest frame-processor results for a camera {seq: int for one cached frame}",
+    "GET /vision/<camera_id>/overlay": "MJPEG stream with detections drawn on the frames",
+    "GET /vision/status": "Processors per camera with submitted, completed and skipped counts"
+}
+
+# Vision API Endpoints
+
+@vision.route('/vision/status', methods=['GET'])
+def vision_status():
+    """Vision stage statistics"""
+    try:
+        return jsonify(stage.status())
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@vision.route('/vision/<camera_id>', methods=['GET'])
+def vision_results(camera_id):
+    """Cached processor results for a camera"""
+    try:
+        cam_id = int(camera_id) if camera_id.isdigit() else camera_id
+        seq = request.args.get('seq', type=int)
+        results = stage.results(cam_id, seq)
+        if results is None:
+            if seq is not None:
+                return jsonify({"error": f"No results cached for frame {seq}"}), 404
+            return jsonify({"error": "No vision processors for this camera"}), 404
+        return jsonify(results)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@vision.route('/vision/<camera_id>/overlay')
+def vision_overlay(camera_id):
+    """Stream a camera with the newest detections drawn on it"""
+    import video_api
+    cam_id = int(camera_id) if camera_id.isdigit() else camera_id
+
+    def overlay(frame):
+        return draw_detections(frame, stage.results(cam_id) or {})
+
+    return Response(video_api.generate_frames(cam_id, overlay=overlay),
+                    mimetype='multipart/x-mixed-replace; boundary=frame')